@@ -0,0 +1,171 @@
+# Shared thread pools running the remote lookups concurrently
+#
+# The sources pool runs source lookups (one remote source for one name),
+# which may in turn fan out single HTTP requests on the requests pool.
+# Requests never submit further tasks, and source lookups called from a
+# sources pool thread run their sub-lookups (e.g. the members of a complex
+# name) in that thread, so no task waits on a task of its own pool and the
+# bounded pools cannot deadlock.
+# A lookup exceeding its timeout, or failing with a degradable error, is
+# dropped with a logged warning, a timed out thread finishing in the
+# background.
+
+import logging
+import threading
+import time
+from typing import Callable, Iterable, List, Sequence
+
+from . import memo
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+MAX_REQUESTS = 8
+TIMEOUT = 60 # seconds, per source lookup
+
+SOURCES = 'sources'
+REQUESTS = 'requests'
+
+_executors = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _set_kind(kind: str):
+    # Pool thread initializer
+    _local.kind = kind
+
+
+def get_executor(kind: str = SOURCES):
+    # Imported here, concurrent.futures weighs on the package import time
+    from concurrent.futures import ThreadPoolExecutor
+    with _lock:
+        if kind not in _executors:
+            max_workers = MAX_WORKERS if kind == SOURCES else MAX_REQUESTS
+            _executors[kind] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f'bdqc_taxa_{kind}',
+                initializer=_set_kind, initargs=(kind,))
+        return _executors[kind]
+
+
+def in_pool(kind: str = SOURCES) -> bool:
+    """Whether the calling thread is a thread of the `kind` pool"""
+    return getattr(_local, 'kind', None) == kind
+
+
+def configure(max_workers: int = None, timeout: float = None,
+              max_requests: int = None):
+    """Set the pool sizes and the per-source timeout
+
+    The pools are recreated with the new sizes on next use.
+    """
+    global MAX_WORKERS, MAX_REQUESTS, TIMEOUT
+    if timeout is not None:
+        TIMEOUT = timeout
+    if max_workers is not None:
+        MAX_WORKERS = max_workers
+    if max_requests is not None:
+        MAX_REQUESTS = max_requests
+    if max_workers is not None or max_requests is not None:
+        shutdown()
+
+
+def shutdown(wait: bool = False):
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+def _run_timed(started: list, func: Callable, args, kwargs):
+    started.append(time.monotonic())
+    return func(*args, **kwargs)
+
+
+def submit(func: Callable, *args, **kwargs):
+    """Run a source lookup on the sources pool
+
+    The returned future records in `started` when the lookup starts running.
+    """
+    started = []
+    future = get_executor(SOURCES).submit(_run_timed, started, func, args, kwargs)
+    future.started = started
+    return future
+
+
+def map_sources(func: Callable, args: Iterable) -> List:
+    """Return `[func(arg) for arg in args]`, calls running on the sources pool
+
+    A single call, or calls made from a sources pool thread, run in the
+    calling thread.
+    """
+    args = list(args)
+    if len(args) <= 1 or in_pool(SOURCES):
+        return [func(arg) for arg in args]
+    executor = get_executor(SOURCES)
+    return [future.result() for future in [executor.submit(func, arg) for arg in args]]
+
+
+def map_requests(func: Callable, args: Iterable) -> List:
+    """Return `[func(arg) for arg in args]`, calls running on the requests pool
+
+    A single call runs in the calling thread.
+    """
+    args = list(args)
+    if len(args) <= 1:
+        return [func(arg) for arg in args]
+    executor = get_executor(REQUESTS)
+    return [future.result() for future in [executor.submit(func, arg) for arg in args]]
+
+
+def _wait(future, start: float, timeout: float) -> bool:
+    # Whether `future` is done within `timeout` seconds from `start`, or from
+    # when its lookup started running if later. A queued lookup has no
+    # deadline yet, futures not created by `submit` are timed from `start`.
+    from concurrent.futures import wait
+    started = getattr(future, 'started', None)
+    while not future.done():
+        if started:
+            begin = max(start, started[0])
+        elif started is not None:
+            begin = time.monotonic()
+        else:
+            begin = start
+        remaining = begin + timeout - time.monotonic()
+        if remaining <= 0:
+            return False
+        wait([future], timeout=remaining)
+    return True
+
+
+def results(futures: Sequence, labels: Sequence[str] = None,
+            timeout: float = None, default: Callable = list,
+            errors: tuple = ()) -> List:
+    """Wait for `futures` and return their results, in order
+
+    Each future is given `timeout` seconds (by default `TIMEOUT`) from this
+    call, or from when its lookup starts running if it is still queued
+    behind busy workers, so a batch larger than the pool is not cut short.
+    Futures not done by then, or raising one of `errors`, are logged with
+    their label and get `default()`; the memoized call running in this
+    thread, if any, is then not cached. Other exceptions raised by the
+    lookups are re-raised.
+    """
+    timeout = TIMEOUT if timeout is None else timeout
+    start = time.monotonic()
+    out = []
+    for i, future in enumerate(futures):
+        label = labels[i] if labels else repr(future)
+        if not _wait(future, start, timeout):
+            future.cancel()
+            logger.warning("%s timed out after %s s", label, timeout)
+        else:
+            try:
+                out.append(future.result())
+                continue
+            except errors as e:
+                logger.warning("%s failed: %s", label, e)
+        memo.skip_caching()
+        out.append(default())
+    return out
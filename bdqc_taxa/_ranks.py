@@ -0,0 +1,15 @@
+# Rank ordering shared by the vernacular and autocomplete modules
+#
+# Kept apart so the offline autocomplete does not import the remote sources.
+
+GBIF_RANKS = ['kingdom', 'phylum', 'class', 'order', 'family',
+                'genus', 'species', 'subspecies', 'variety']
+
+
+def rank_order(rank):
+    if not rank:
+        return 9999
+    try:
+        return GBIF_RANKS.index(rank.lower())
+    except ValueError:
+        return 9999
@@ -0,0 +1,263 @@
+# Shared HTTP transport for the remote sources (gbif, global_names, wikidata)
+#
+# Connections are kept alive in per-host pools so consecutive requests to a
+# same host reuse the TCP+TLS session. Responses are requested gzip encoded
+# and decoded transparently.
+#
+# Requests go through the rate limiting, retry and circuit breaker policy of
+# their host (see `policy`). Failures are raised as `RemoteSourceError`, a
+# `urllib.error.URLError` carrying the HTTP status if any.
+
+import gzip
+import http.client
+import json
+import socket
+import threading
+import zlib
+from typing import Optional
+from urllib.parse import urlencode, urlsplit
+
+from . import policy
+from .__about__ import __title__, __version__
+from .policy import RemoteSourceError
+
+__all__ = ['request', 'get_json', 'post_json', 'configure', 'close']
+
+TIMEOUT = 30 # seconds
+POOL_SIZE = 10 # idle connections kept per host
+USER_AGENT = f"{__title__}/{__version__}"
+
+# Errors raised when a kept-alive connection was closed by the server
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class Response:
+    def __init__(self, url: str, status: int, reason: str, headers, data: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.status}, '{self.url}')"
+
+    def json(self):
+        return json.loads(self.data.decode('utf-8'))
+
+
+class ConnectionPool:
+    def __init__(self, scheme: str, host: str, port: Optional[int] = None,
+                 maxsize: int = POOL_SIZE):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.created = 0 # number of connections opened, for monitoring
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self, timeout: float):
+        if self.scheme == 'https':
+            conn_cls = http.client.HTTPSConnection
+        else:
+            conn_cls = http.client.HTTPConnection
+        with self._lock:
+            self.created += 1
+        return conn_cls(self.host, self.port, timeout=timeout)
+
+    def _get_connection(self, timeout: float):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return self._new_connection(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _put_connection(self, conn):
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def urlopen(self, method: str, path: str, body: bytes = None,
+                headers: dict = None, timeout: float = TIMEOUT):
+        conn, reused = self._get_connection(timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+            # The server closed the idle connection, retry on a new one
+            conn = self._new_connection(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._put_connection(conn)
+        return resp, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(scheme: str, netloc: str) -> ConnectionPool:
+    key = (scheme, netloc)
+    with _pools_lock:
+        try:
+            return _pools[key]
+        except KeyError:
+            parts = urlsplit(f"{scheme}://{netloc}")
+            pool = ConnectionPool(
+                scheme, parts.hostname, parts.port, maxsize=POOL_SIZE)
+            _pools[key] = pool
+            return pool
+
+
+def _decode(data: bytes, encoding: Optional[str]) -> bytes:
+    if encoding and encoding.lower() == 'gzip':
+        return gzip.decompress(data)
+    return data
+
+
+def request(method: str, url: str, params: dict = None, body: bytes = None,
+            headers: dict = None, timeout: float = None) -> Response:
+    """Send an HTTP request through the pooled connection of the url host
+
+    Parameters
+    ----------
+    method : str
+        HTTP method, e.g. GET or POST
+    url : str
+        Absolute url, may already contain a query string
+    params : dict, optional
+        Query parameters appended to the url
+    body : bytes, optional
+        Request body
+    headers : dict, optional
+        Request headers
+    timeout : float, optional
+        Socket timeout in seconds, defaults to `TIMEOUT`
+
+    Returns
+    -------
+    Response
+        The decoded response
+
+    Raises
+    ------
+    RemoteSourceError
+        If the response status is 400 or higher, or the host can not be
+        reached, once retries are exhausted or while its circuit is open
+    """
+    if timeout is None:
+        timeout = TIMEOUT
+    if params:
+        sep = '&' if '?' in url else '?'
+        url = f"{url}{sep}{urlencode(params)}"
+
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f"{path}?{parts.query}"
+
+    req_headers = {
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': 'gzip',
+    }
+    req_headers.update(headers or {})
+
+    pool = _get_pool(parts.scheme, parts.netloc)
+
+    def send():
+        try:
+            resp, data = pool.urlopen(method, path, body, req_headers, timeout)
+        except (OSError, http.client.HTTPException) as e:
+            reason = e if isinstance(e, socket.timeout) \
+                else getattr(e, 'strerror', None) or e
+            raise RemoteSourceError(
+                reason, host=parts.hostname, url=url, retryable=True) from e
+
+        try:
+            data = _decode(data, resp.getheader('Content-Encoding'))
+        except (OSError, EOFError, zlib.error) as e:
+            # Truncated or corrupted body
+            raise RemoteSourceError(
+                f"Invalid response body: {e}", host=parts.hostname, url=url,
+                status=resp.status, retryable=True) from e
+        if resp.status >= 400:
+            raise RemoteSourceError(
+                resp.reason, host=parts.hostname, url=url, status=resp.status,
+                retryable=resp.status in policy.RETRY_STATUSES,
+                retry_after=_retry_after(resp.getheader('Retry-After')))
+        return Response(url, resp.status, resp.reason, resp.headers, data)
+
+    return policy.get_policy(parts.hostname).call(send, url)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    # Only the delay-seconds form of the header is used
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_json(url: str, params: dict = None, **kwargs):
+    return request('GET', url, params, **kwargs).json()
+
+
+def post_json(url: str, payload, **kwargs):
+    headers = {'Content-Type': 'application/json'}
+    headers.update(kwargs.pop('headers', None) or {})
+    body = json.dumps(payload).encode('utf-8')
+    return request('POST', url, body=body, headers=headers, **kwargs).json()
+
+
+def configure(timeout: float = None, pool_size: int = None):
+    """Set the default timeout and the number of idle connections per host"""
+    global TIMEOUT, POOL_SIZE
+    if timeout is not None:
+        TIMEOUT = timeout
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+        with _pools_lock:
+            for pool in _pools.values():
+                pool.maxsize = pool_size
+
+
+def close():
+    """Close all idle connections"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
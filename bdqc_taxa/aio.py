@@ -0,0 +1,175 @@
+# Asyncio counterparts of `TaxaRef.from_all_sources` and `Vernacular.from_match`
+#
+# Remote lookups run in the default executor so they do not block the event
+# loop, and are limited per host by semaphores. SQLite lookups of the custom
+# sources are sub-millisecond and run on the loop thread while the remote
+# lookups are in flight.
+#
+# Returned objects are the same `TaxaRef` and `Vernacular` instances as the
+# sync API produces.
+
+import asyncio
+import logging
+from functools import partial
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+from . import gbif, global_names, wikidata
+from .policy import RemoteSourceError
+from .taxa_ref import TaxaRef, _broadcast, _member_refs, complex_members
+from .vernacular import Vernacular, GBIF_RANKS
+
+__all__ = ['HostLimits', 'from_all_sources', 'from_all_sources_many',
+           'vernacular_from_match', 'vernacular_from_match_many']
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_NAMES_HOST = urlsplit(global_names.HOST).hostname
+GBIF_HOST = urlsplit(gbif.HOST).hostname
+WIKIDATA_HOST = urlsplit(wikidata.BASE_URL).hostname
+
+# Maximum number of concurrent requests per host
+HOST_CONCURRENCY = {
+    GLOBAL_NAMES_HOST: 4,
+    GBIF_HOST: 8,
+    WIKIDATA_HOST: 4,
+}
+DEFAULT_CONCURRENCY = 4
+
+
+class HostLimits:
+    """Per host semaphores bounding the concurrent blocking calls
+
+    Must be created and used within the same event loop.
+    """
+    def __init__(self, limits: Dict[str, int] = None):
+        self.limits = {**HOST_CONCURRENCY, **(limits or {})}
+        self._semaphores = {}
+
+    def semaphore(self, host: str) -> asyncio.Semaphore:
+        try:
+            return self._semaphores[host]
+        except KeyError:
+            sem = asyncio.Semaphore(self.limits.get(host, DEFAULT_CONCURRENCY))
+            self._semaphores[host] = sem
+            return sem
+
+    async def run(self, host: str, func, *args, **kwargs):
+        async with self.semaphore(host):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, partial(func, *args, **kwargs))
+
+
+async def _degrade(task, label: str):
+    """Await `task`, returning [] with a logged warning if a request failed"""
+    try:
+        return await task
+    except RemoteSourceError as e:
+        logger.warning("%s failed: %s", label, e)
+        return []
+
+
+async def from_all_sources(name: str, authorship: str = None,
+                           parent_taxa: str = None,
+                           limits: HostLimits = None) -> List[TaxaRef]:
+    """Async counterpart of `TaxaRef.from_all_sources`"""
+    if limits is None:
+        limits = HostLimits()
+
+    # Start remote lookups before the local ones, GBIF once per member of a
+    # complex name
+    members = complex_members(name)
+    unique_members = list(dict.fromkeys(members))
+    gn_task = asyncio.ensure_future(limits.run(
+        GLOBAL_NAMES_HOST, TaxaRef.from_global_names, name, authorship))
+    gbif_tasks = [
+        asyncio.ensure_future(limits.run(
+            GBIF_HOST, TaxaRef.from_gbif, member, authorship))
+        for member in unique_members]
+
+    try:
+        custom = TaxaRef.from_custom_sources_many(unique_members)
+        gn_refs, *gbif_refs = await asyncio.gather(
+            _degrade(gn_task, f"Global Names '{name}'"),
+            *[_degrade(task, f"GBIF '{member}'")
+              for task, member in zip(gbif_tasks, unique_members)])
+    except BaseException:
+        for task in (gn_task, *gbif_tasks):
+            task.cancel()
+        raise
+
+    out = [*gn_refs,
+           *_member_refs(members, dict(zip(unique_members, gbif_refs))),
+           *_member_refs(members, custom)]
+    return TaxaRef._merge_sources(name, out, parent_taxa)
+
+
+async def from_all_sources_many(names: List[str],
+                                authorships: Union[str, List[str]] = None,
+                                parent_taxa: Union[str, List[str]] = None,
+                                limits: HostLimits = None
+                                ) -> List[List[TaxaRef]]:
+    """Async counterpart of `TaxaRef.from_all_sources_batch`, results in input order"""
+    if limits is None:
+        limits = HostLimits()
+
+    queries = list(zip(
+        names,
+        _broadcast(authorships, len(names)),
+        _broadcast(parent_taxa, len(names))))
+    unique_queries = list(dict.fromkeys(queries))
+
+    outs = await asyncio.gather(*[
+        from_all_sources(*query, limits=limits) for query in unique_queries])
+    results = dict(zip(unique_queries, outs))
+
+    return [results[query] for query in queries]
+
+
+async def vernacular_from_match(name: str, rank: Optional[str] = None,
+                                limits: HostLimits = None,
+                                **match_kwargs) -> List[Vernacular]:
+    """Async counterpart of `Vernacular.from_match`"""
+    if limits is None:
+        limits = HostLimits()
+
+    rank_qid = Vernacular._wikidata_rank_qid(rank)
+    gbif_task = asyncio.ensure_future(limits.run(
+        GBIF_HOST, Vernacular.from_gbif_match, name, **match_kwargs))
+    # Wikidata requests do not depend on the rank, only the filtering does
+    wikidata_task = asyncio.ensure_future(limits.run(
+        WIKIDATA_HOST, Vernacular._wikidata_entities, name))
+
+    try:
+        local_out = [
+            *Vernacular.from_bryoquel_match(name),
+            *Vernacular.from_cdpnq_match(name),
+            *Vernacular.from_eliso_match(name),
+        ]
+        gbif_out = await _degrade(gbif_task, f"GBIF vernacular '{name}'")
+
+        if not rank and gbif_out:
+            rank = GBIF_RANKS[gbif_out[0].rank_order]
+            rank_qid = Vernacular._wikidata_rank_qid(rank)
+        entities = await _degrade(wikidata_task, f"Wikidata '{name}'")
+    except BaseException:
+        gbif_task.cancel()
+        wikidata_task.cancel()
+        raise
+    wikidata_out = Vernacular._from_wikidata_entities(name, entities, rank, rank_qid)
+
+    return [*gbif_out, *local_out, *wikidata_out]
+
+
+async def vernacular_from_match_many(names: List[str],
+                                     limits: HostLimits = None
+                                     ) -> Dict[str, List[Vernacular]]:
+    """Match the vernacular names of many names concurrently"""
+    if limits is None:
+        limits = HostLimits()
+
+    unique_names = list(dict.fromkeys(names))
+    outs = await asyncio.gather(*[
+        vernacular_from_match(name, limits=limits) for name in unique_names])
+    return dict(zip(unique_names, outs))
@@ -0,0 +1,195 @@
+# Autocomplete scientific and vernacular names from the custom sources
+#
+# Names are matched by prefix, on the whole name or on any of its words,
+# against a sorted index loaded from the custom_sources sqlite database on
+# first use. When no name starts with the query, names containing it are
+# searched in the FTS5 trigram tables (see `scripts/make_indexes.py`).
+
+from bisect import bisect_left
+from heapq import nsmallest
+from typing import List, Sequence
+
+from . import custom_sources
+from ._ranks import rank_order
+
+LIMIT = 10
+
+# Searched tables, by source name.
+# Fields are the searched columns and their language (None for scientific names)
+TABLES = {
+    'Bryoquel': [{
+        'table': 'bryoquel',
+        'scientific_name': 'scientific_name',
+        'valid_name': 'scientific_name',
+        'rank': 'taxon_rank',
+        'fields': {'scientific_name': None, 'vernacular_fr': 'fra', 'vernacular_en': 'eng'},
+    }],
+    'CDPNQ': [{
+        'table': 'cdpnq_odonates',
+        'scientific_name': 'name',
+        'valid_name': 'valid_name',
+        'rank': 'rank',
+        'fields': {'name': None, 'vernacular_fr': 'fra'},
+    }, {
+        'table': 'cdpnq_vertebrates',
+        'scientific_name': 'name',
+        'valid_name': 'valid_name',
+        'rank': 'rank',
+        'fields': {'name': None, 'vernacular_fr': 'fra', 'vernacular_en': 'eng'},
+    }],
+    'Eliso': [{
+        'table': 'eliso_invertebrates',
+        'scientific_name': 'taxa_name',
+        'valid_name': 'taxa_name',
+        'rank': 'taxa_rank',
+        'fields': {'taxa_name': None, 'vernacular_fr': 'fra'},
+    }],
+}
+
+SOURCES = tuple(TABLES.keys())
+
+# Match quality, from best to worst
+MATCH_QUALITY = ['exact', 'prefix', 'word_prefix', 'infix']
+EXACT, PREFIX, WORD_PREFIX, INFIX = range(len(MATCH_QUALITY))
+
+TRIGRAM_LEN = 3
+
+# Sorted prefix index, loaded on first use: (keys, entries)
+_index = None
+
+
+def _table_rows(spec: dict) -> List[tuple]:
+    columns = [spec['scientific_name'], spec['valid_name'], spec['rank'],
+               *spec['fields'].keys()]
+    select = ", ".join(f't."{col}"' for col in columns)
+    c = custom_sources.execute(f'SELECT {select} FROM "{spec["table"]}" t')
+    rows = c.fetchall()
+    c.close()
+    return rows
+
+
+def _entries(source: str, spec: dict, row: tuple):
+    scientific_name, valid_name, rank, *values = row
+    for (field, language), value in zip(spec['fields'].items(), values):
+        if not isinstance(value, str) or not value.strip():
+            continue
+        yield value, {
+            'name': value,
+            'language': language,
+            'source': source,
+            'scientific_name': scientific_name,
+            'valid_name': valid_name,
+            'rank': rank,
+            'rank_order': rank_order(rank),
+        }
+
+
+def _load_index():
+    global _index
+    if _index is not None:
+        return _index
+
+    items = []
+    for source, specs in TABLES.items():
+        for spec in specs:
+            for row in _table_rows(spec):
+                for value, entry in _entries(source, spec, row):
+                    words = value.casefold().split()
+                    # Index the whole name and each of its word suffixes
+                    items.append((" ".join(words), False, entry))
+                    for i in range(1, len(words)):
+                        items.append((" ".join(words[i:]), True, entry))
+    items.sort(key=lambda x: x[0])
+    _index = ([item[0] for item in items], [item[1:] for item in items])
+    return _index
+
+
+def _search_infix(spec: dict, query: str) -> List[tuple]:
+    table = spec['table']
+    fts = f"{table}_fts"
+    columns = [spec['scientific_name'], spec['valid_name'], spec['rank'],
+               *spec['fields'].keys()]
+    select = ", ".join(f't."{col}"' for col in columns)
+    c = custom_sources.execute(f'''
+    SELECT {select} FROM "{fts}"
+    JOIN "{table}" t ON t.rowid = "{fts}".rowid
+    WHERE "{fts}" MATCH ?
+    ''', ('"' + query.replace('"', '""') + '"',))
+    rows = c.fetchall()
+    c.close()
+    return rows
+
+
+def _add(out: dict, entry: dict, quality: int):
+    key = (entry['source'], entry['name'], entry['valid_name'])
+    if key in out and out[key][0] <= quality:
+        return
+    out[key] = (quality, entry)
+
+
+def autocomplete(prefix: str, limit: int = LIMIT,
+                 sources: Sequence[str] = SOURCES) -> List[dict]:
+    """Complete a scientific or vernacular name from the custom sources
+
+    Parameters
+    ----------
+    prefix : str
+        The beginning of the name to complete
+    limit : int
+        The maximum number of suggestions
+    sources : list of str
+        The sources to search, among 'Bryoquel', 'CDPNQ' and 'Eliso'
+
+    Returns
+    -------
+    list of dict
+        Suggestions ordered by match quality, rank order and length, with
+        the following keys:
+        - name: the matched scientific or vernacular name
+        - language: 'fra' or 'eng' for vernacular names, None for scientific names
+        - source: the source name
+        - scientific_name: the scientific name of the taxon
+        - valid_name: the valid scientific name of the taxon
+        - rank: the taxon rank
+        - rank_order: the rank order of the taxon
+        - match_quality: 'exact', 'prefix', 'word_prefix' or 'infix'
+    """
+    for source in sources:
+        if source not in TABLES:
+            raise ValueError(f"Source '{source}' is not in {SOURCES}.")
+
+    query = " ".join(prefix.split()).casefold()
+    if not query:
+        return []
+
+    keys, entries = _load_index()
+    out = {}
+    i = bisect_left(keys, query)
+    while i < len(keys) and keys[i].startswith(query):
+        is_word, entry = entries[i]
+        if entry['source'] in sources:
+            if is_word:
+                quality = WORD_PREFIX
+            elif keys[i] == query:
+                quality = EXACT
+            else:
+                quality = PREFIX
+            _add(out, entry, quality)
+        i += 1
+
+    # Fall back on names containing the query
+    if not out and len(query) >= TRIGRAM_LEN:
+        for source in sources:
+            for spec in TABLES[source]:
+                for row in _search_infix(spec, query):
+                    for value, entry in _entries(source, spec, row):
+                        if query in value.casefold():
+                            _add(out, entry, INFIX)
+
+    best = nsmallest(
+        limit, out.values(),
+        key=lambda x: (x[0], x[1]['rank_order'], len(x[1]['name']),
+                       x[1]['name'], x[1]['source']))
+    return [
+        {**entry, 'match_quality': MATCH_QUALITY[quality]}
+        for quality, entry in best]
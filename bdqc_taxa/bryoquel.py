@@ -10,17 +10,30 @@
 # authorship: Auteur obtenu de Noms latins accept�s
 
 
-import sqlite3
-import importlib.resources
+from typing import Dict
 
-# Get the database file from the package data
+from . import custom_sources
+from . import memory_index
 
-DB_FILE = 'custom_sources.sqlite'
-with importlib.resources.open_binary('bdqc_taxa', DB_FILE) as db_file:
-    db_path = db_file.name
+DB_FILE = custom_sources.DB_FILE
 
-# Connect to the database
-conn = sqlite3.connect(db_path)
+
+def __getattr__(name):
+    # Module attributes of earlier versions, resolved on use. `conn` is the
+    # read-only connection of the calling thread.
+    if name == 'db_path':
+        return custom_sources.get_db_path()
+    if name == 'conn':
+        return custom_sources.get_connection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+MATCH_SQL = '''
+    SELECT * FROM bryoquel
+    WHERE scientific_name = ?
+    ORDER BY taxon_rank
+    LIMIT 1
+    '''
 
 def match_taxa(species) -> dict:
     """Match a species name to the Bryoquel database
@@ -45,21 +58,43 @@ def match_taxa(species) -> dict:
         - vernacular_name_fr: Noms fran�ais accept�s
         - vernacular_name_en: Noms anglais accept�s
     """
-    # Get the cursor
-    c = conn.cursor()
-    
     # Get the species name
     species = species.strip()
 
-    c.execute('''
-    SELECT * FROM bryoquel
-    WHERE scientific_name = ?
-    ORDER BY taxon_rank
-    LIMIT 1
-    ''', (species,))
+    if memory_index.is_enabled():
+        rows = memory_index.first_row('bryoquel', species)
+    else:
+        rows = custom_sources.execute(MATCH_SQL, (species,)).fetchone()
+
+    return _to_dict(rows)
+
+def match_taxa_many(names) -> Dict[str, dict]:
+    """Match many species names to the Bryoquel database
+
+    Names are looked up together, with one query per
+    `custom_sources.IN_SIZE` names.
+
+    Parameters
+    ----------
+    names : list of str
+        The species names to match
+
+    Returns
+    -------
+    dict
+        {name: result of `match_taxa(name)`} for each name
+    """
+    species = {name: name.strip() for name in names}
+
+    if memory_index.is_enabled():
+        rows = memory_index.first_rows('bryoquel', species.values())
+    else:
+        rows = custom_sources.first_rows(
+            'bryoquel', 'scientific_name', 'taxon_rank', species.values())
 
-    rows = c.fetchone()
+    return {name: _to_dict(rows.get(stripped)) for name, stripped in species.items()}
 
+def _to_dict(rows) -> dict:
     # If there is a match, return the result
     if rows:
         return {
@@ -0,0 +1,195 @@
+# Persistent on-disk cache of the remote sources responses
+#
+# Responses are stored in a local SQLite file, keyed by the normalized request
+# (url, query parameters and body). Each source has its own time to live and
+# the least recently used entries are evicted once `max_entries` is reached.
+#
+# The cache is disabled by default. Enable it with:
+#
+#   from bdqc_taxa import cache
+#   cache.enable('/path/to/responses.sqlite')
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlencode
+
+__all__ = ['ResponseCache', 'enable', 'disable', 'get_cache', 'cached']
+
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'bdqc_taxa', 'responses.sqlite')
+
+DAY = 24 * 60 * 60
+
+# Time to live per source, in seconds
+DEFAULT_TTL = {
+    'gbif': 30 * DAY,
+    'global_names': 7 * DAY,
+    'wikidata': 7 * DAY,
+}
+
+MAX_ENTRIES = 100000
+
+
+def request_key(url: str, params: dict = None, body=None) -> str:
+    """Normalize a request as a cache key"""
+    key = url
+    if params:
+        key += '?' + urlencode(sorted(params.items()))
+    if body is not None:
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body, sort_keys=True)
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        key += '\n' + body
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str = DEFAULT_PATH, ttl: Dict[str, float] = None,
+                 max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.max_entries = max_entries
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            source TEXT,
+            created REAL,
+            accessed REAL,
+            value TEXT
+        )''')
+        self._conn.execute('''
+        CREATE INDEX IF NOT EXISTS ix_responses_accessed
+        ON responses (accessed)''')
+        self._conn.commit()
+        self._size = self._conn.execute(
+            'SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def __len__(self):
+        return self._size
+
+    def get(self, source: str, key: str):
+        """Return the cached value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT created, value FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            ttl = self.ttl.get(source)
+            if row is not None and ttl is not None and now - row[0] > ttl:
+                self._conn.execute(
+                    'DELETE FROM responses WHERE key = ?', (key,))
+                self._conn.commit()
+                self._size -= 1
+                row = None
+
+            if row is None:
+                self.misses[source] = self.misses.get(source, 0) + 1
+                return None
+
+            self._conn.execute(
+                'UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits[source] = self.hits.get(source, 0) + 1
+        return json.loads(row[1])
+
+    def set(self, source: str, key: str, value):
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute(
+                'SELECT 1 FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                (key, source, now, now, json.dumps(value)))
+            if not exists:
+                self._size += 1
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+            self._conn.commit()
+
+    def _evict(self, n: int):
+        # Remove the n least recently used entries
+        self._conn.execute('''
+        DELETE FROM responses WHERE key IN (
+            SELECT key FROM responses ORDER BY accessed LIMIT ?)''', (n,))
+        self._size -= n
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+            self._size = 0
+            self.hits = {}
+            self.misses = {}
+
+    def info(self) -> dict:
+        """Return the hit and miss counters per source and the cache size"""
+        with self._lock:
+            return {
+                'hits': dict(self.hits),
+                'misses': dict(self.misses),
+                'size': self._size,
+                'max_entries': self.max_entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def enable(path: str = DEFAULT_PATH, ttl: Dict[str, float] = None,
+           max_entries: int = MAX_ENTRIES) -> ResponseCache:
+    """Cache the remote sources responses in the SQLite file at `path`"""
+    global _cache
+    disable()
+    _cache = ResponseCache(path, ttl, max_entries)
+    return _cache
+
+
+def disable():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    return _cache
+
+
+def cached(source: str, fetch: Callable, url: str, params: dict = None,
+           body=None):
+    """Return the cached response of a request, or fetch and store it
+
+    Only JSON responses (dict or list) are stored, errors returned by `fetch`
+    and error payloads are passed through.
+    """
+    response_cache = _cache
+    if response_cache is None:
+        return fetch()
+
+    key = request_key(url, params, body)
+    out = response_cache.get(source, key)
+    if out is not None:
+        return out
+
+    out = fetch()
+    if isinstance(out, dict) and 'error' not in out \
+            or isinstance(out, list) and out != [None]:
+        response_cache.set(source, key, out)
+    return out
@@ -12,17 +12,35 @@
 
 
 
-import sqlite3
-import importlib.resources
+from typing import Dict
 
-# Get the database file from the package data
+from . import custom_sources
+from . import memory_index
 
-DB_FILE = 'custom_sources.sqlite'
-with importlib.resources.open_binary('bdqc_taxa', DB_FILE) as db_file:
-    db_path = db_file.name
+DB_FILE = custom_sources.DB_FILE
 
-# Connect to the database
-conn = sqlite3.connect(db_path)
+
+def __getattr__(name):
+    # Module attributes of earlier versions, resolved on use. `conn` is the
+    # read-only connection of the calling thread.
+    if name == 'db_path':
+        return custom_sources.get_db_path()
+    if name == 'conn':
+        return custom_sources.get_connection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+ODONATES_SQL = '''
+    SELECT * FROM cdpnq_odonates
+    WHERE name = ?
+    ORDER BY rank
+    '''
+
+VERTEBRATES_SQL = '''
+    SELECT * FROM cdpnq_vertebrates
+    WHERE name = ?
+    ORDER BY rank
+    '''
 
 def match_taxa_odonates(name) -> dict:
     """Match a species name to the Bryoquel database
@@ -45,25 +63,23 @@ def match_taxa_odonates(name) -> dict:
 
     """
 
-    # Get the cursor
-    c = conn.cursor()
-
     # Get the species name
     name = name.strip()
     name = name.replace(',', "")
 
-    c.execute('''
-    SELECT * FROM cdpnq_odonates
-    WHERE name = ?
-    ORDER BY rank
-    ''', (name,))
-
     # Get the first result
-    result = c.fetchone()
+    if memory_index.is_enabled():
+        result = memory_index.first_row('cdpnq_odonates', name)
+    else:
+        c = custom_sources.execute(ODONATES_SQL, (name,))
+        result = c.fetchone()
 
-    # Close the cursor
-    c.close()
+        # Close the cursor
+        c.close()
 
+    return _odonates_dict(result)
+
+def _odonates_dict(result) -> dict:
     # Return the result
     if result:
         return {
@@ -98,25 +114,23 @@ def match_taxa_vertebrates(name) -> dict:
         vernacular_en: vernacular name in English
     """
 
-    # Get the cursor
-    c = conn.cursor()
-
     # Get the species name
     name = name.strip()
     name = name.replace(',', "")
 
-    c.execute('''
-    SELECT * FROM cdpnq_vertebrates
-    WHERE name = ?
-    ORDER BY rank
-    ''', (name,))
-
     # Get the first result
-    result = c.fetchone()
+    if memory_index.is_enabled():
+        result = memory_index.first_row('cdpnq_vertebrates', name)
+    else:
+        c = custom_sources.execute(VERTEBRATES_SQL, (name,))
+        result = c.fetchone()
+
+        # Close the cursor
+        c.close()
 
-    # Close the cursor
-    c.close()
+    return _vertebrates_dict(result)
 
+def _vertebrates_dict(result) -> dict:
     # Return the result
     if result:
         return {
@@ -153,15 +167,49 @@ def match_taxa(name) -> dict:
         vernacular_en: vernacular name in English
     """
 
+    return _combine(match_taxa_odonates(name), match_taxa_vertebrates(name))
+
+def match_taxa_many(names) -> Dict[str, list]:
+    """Match many species names to the CDPNQ database
+
+    Names are looked up together, with one query per table and per
+    `custom_sources.IN_SIZE` names.
+
+    Parameters
+    ----------
+    names : list of str
+
+    Returns
+    -------
+    dict
+        {name: result of `match_taxa(name)`} for each name
+    """
+    # Same normalization as the single name lookups
+    keys = {name: name.strip().replace(',', "") for name in names}
+
+    if memory_index.is_enabled():
+        odonates = memory_index.first_rows('cdpnq_odonates', keys.values())
+        vertebrates = memory_index.first_rows('cdpnq_vertebrates', keys.values())
+    else:
+        odonates = custom_sources.first_rows(
+            'cdpnq_odonates', 'name', 'rank', keys.values())
+        vertebrates = custom_sources.first_rows(
+            'cdpnq_vertebrates', 'name', 'rank', keys.values())
+
+    return {
+        name: _combine(
+            _odonates_dict(odonates.get(key)),
+            _vertebrates_dict(vertebrates.get(key)))
+        for name, key in keys.items()}
+
+def _combine(odonates: dict, vertebrates: dict) -> list:
     out = []
 
-    odonates = match_taxa_odonates(name)
     if odonates:
         # Add vernacular_en
         odonates = {**odonates, 'vernacular_en': None}
         out = [*out, odonates]
     
-    vertebrates = match_taxa_vertebrates(name)
     if vertebrates:
         # Add vernacular_fr2
         vertebrates = {**vertebrates, 'vernacular_fr2': None}
@@ -171,3 +219,74 @@ def match_taxa(name) -> dict:
         return out
     else:
         return None
+
+def resolve(name) -> list:
+    """Match a name to the CDPNQ database, with the valid name of synonyms
+
+    Parameters
+    ----------
+    name : str
+
+    Returns
+    -------
+    list
+        (match, valid_match) tuples, where match is an item of
+        `match_taxa(name)` and valid_match the first item of
+        `match_taxa(match['valid_name'])` for synonyms, or None otherwise.
+        None if the name is not matched.
+    """
+    return resolve_many([name])[name]
+
+def resolve_many(names) -> Dict[str, list]:
+    """Match many names to the CDPNQ database, with the valid name of synonyms
+
+    The rows of both tables are looked up for all the names at once, then
+    for all the valid names of the matched synonyms at once.
+
+    Parameters
+    ----------
+    names : list of str
+
+    Returns
+    -------
+    dict
+        {name: result of `resolve(name)`} for each name
+    """
+    # Same normalization as the single name lookups
+    keys = {name: name.strip().replace(',', "") for name in names}
+
+    odonates, vertebrates = _first_rows(keys.values())
+    # Valid names of synonyms not yet looked up, synonym is the 4th column
+    valid_names = {
+        row[1] for rows in (odonates, vertebrates) for row in rows.values()
+        if row[3]} - odonates.keys() - vertebrates.keys()
+    if valid_names:
+        valid_odonates, valid_vertebrates = _first_rows(valid_names)
+        odonates.update(valid_odonates)
+        vertebrates.update(valid_vertebrates)
+
+    def lookup(key):
+        return _combine(
+            _odonates_dict(odonates.get(key)),
+            _vertebrates_dict(vertebrates.get(key)))
+
+    out = {}
+    for name, key in keys.items():
+        matches = lookup(key)
+        if matches is None:
+            out[name] = None
+            continue
+        out[name] = [
+            (match, (lookup(match['valid_name']) or [None])[0]
+                if match['synonym'] else None)
+            for match in matches]
+    return out
+
+def _first_rows(keys):
+    # {name: first row} of the odonates and of the vertebrates
+    if memory_index.is_enabled():
+        return (memory_index.first_rows('cdpnq_odonates', keys),
+                memory_index.first_rows('cdpnq_vertebrates', keys))
+    keys = list(keys)
+    return (custom_sources.first_rows('cdpnq_odonates', 'name', 'rank', keys),
+            custom_sources.first_rows('cdpnq_vertebrates', 'name', 'rank', keys))
@@ -0,0 +1,153 @@
+# Columnar export of TaxaRef results
+#
+# Turns resolution results into column arrays, as a dict of lists or as
+# pyarrow record batches (`pip install bdqc_taxa[arrow]`), one chunk at a
+# time. Results can be given as a lazy iterable so a large batch is never
+# held in memory as TaxaRef objects at once, e.g.
+#
+#   names = (line.strip() for line in file)
+#   results = ((name, TaxaRef.from_all_sources(name)) for name in names)
+#   for batch in iter_arrow_batches(results):
+#       ...
+
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from .taxa_ref import TaxaRef
+
+__all__ = ['COLUMNS', 'iter_columns', 'to_columns',
+           'arrow_schema', 'iter_arrow_batches', 'to_arrow']
+
+CHUNK_SIZE = 10000
+
+COLUMNS = TaxaRef.FIELDS
+INPUT_NAME = 'input_name'
+
+# Either refs, or refs by input name
+Results = Union[Iterable[TaxaRef],
+                Mapping[str, List[TaxaRef]],
+                Iterable[Tuple[str, List[TaxaRef]]]]
+
+
+def _iter_rows(results: Results) -> Tuple[bool, Iterator[tuple]]:
+    """Return whether rows have an input name, and the row tuples"""
+    if isinstance(results, Mapping):
+        results = results.items()
+    results = iter(results)
+    try:
+        first = next(results)
+    except StopIteration:
+        return False, iter(())
+    results = chain([first], results)
+
+    if isinstance(first, TaxaRef):
+        return False, (ref.to_tuple() for ref in results)
+    if not (isinstance(first, (tuple, list)) and len(first) == 2
+            and isinstance(first[0], str)):
+        raise TypeError(
+            "results must be TaxaRef or (name, refs) pairs, got "
+            f"{type(first).__name__}; pair the refs of each name with it, "
+            "e.g. zip(names, TaxaRef.from_all_sources_batch(names))")
+    return True, (
+        (*ref.to_tuple(), name) for name, refs in results for ref in refs)
+
+
+def iter_columns(results: Results,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, list]]:
+    """Yield the results as dicts of lists of at most `chunk_size` rows
+
+    Parameters
+    ----------
+    results : iterable of TaxaRef, dict or iterable of (name, list of TaxaRef)
+        The refs, or the refs by input name such as
+        `zip(names, TaxaRef.from_all_sources_batch(names))`, in which case an
+        `input_name` column is added
+    chunk_size : int
+        The maximum number of rows per chunk
+
+    Yields
+    ------
+    dict
+        {column: list of values}, with the columns of `COLUMNS`
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    named, rows = _iter_rows(results)
+    columns = (*COLUMNS, INPUT_NAME) if named else COLUMNS
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield dict(zip(columns, map(list, zip(*chunk))))
+
+
+def to_columns(results: Results) -> Dict[str, list]:
+    """Return all the results as a single dict of lists, see `iter_columns`"""
+    out = None
+    for chunk in iter_columns(results):
+        if out is None:
+            out = chunk
+        else:
+            for column, values in chunk.items():
+                out[column].extend(values)
+    return out if out is not None else {column: [] for column in COLUMNS}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for Arrow output, "
+            "install it with `pip install bdqc_taxa[arrow]`") from e
+    return pyarrow
+
+
+def arrow_schema(named: bool = False):
+    """The pyarrow schema of the results, with `input_name` if `named`"""
+    pa = _import_pyarrow()
+    fields = [
+        ('id', pa.int64()),
+        ('source_id', pa.int64()),
+        ('source_record_id', pa.string()),
+        ('source_name', pa.string()),
+        ('scientific_name', pa.string()),
+        ('authorship', pa.string()),
+        ('rank', pa.string()),
+        ('rank_order', pa.int64()),
+        ('classification_srids', pa.list_(pa.string())),
+        ('valid', pa.bool_()),
+        ('valid_srid', pa.string()),
+        ('match_type', pa.string()),
+        ('is_parent', pa.bool_()),
+    ]
+    if named:
+        fields.append((INPUT_NAME, pa.string()))
+    return pa.schema(fields)
+
+
+def _str_or_none(value):
+    # Record ids are integers for some sources (GBIF, Bryoquel)
+    return None if value is None else str(value)
+
+
+def iter_arrow_batches(results: Results, chunk_size: int = CHUNK_SIZE):
+    """Yield the results as pyarrow RecordBatch of at most `chunk_size` rows"""
+    pa = _import_pyarrow()
+    for chunk in iter_columns(results, chunk_size):
+        schema = arrow_schema(INPUT_NAME in chunk)
+        for column in ('source_record_id', 'valid_srid'):
+            chunk[column] = [_str_or_none(x) for x in chunk[column]]
+        chunk['classification_srids'] = [
+            None if srids is None else [_str_or_none(x) for x in srids]
+            for srids in chunk['classification_srids']]
+        yield pa.RecordBatch.from_pydict(chunk, schema=schema)
+
+
+def to_arrow(results: Results, chunk_size: int = CHUNK_SIZE):
+    """Return the results as a pyarrow Table, built from chunked batches"""
+    pa = _import_pyarrow()
+    batches = list(iter_arrow_batches(results, chunk_size))
+    if not batches:
+        return arrow_schema().empty_table()
+    return pa.Table.from_batches(batches)
@@ -0,0 +1,112 @@
+# Read-only connections to the custom_sources sqlite database
+#
+# Shared by the bryoquel, cdpnq and eliso modules. The database is opened
+# read-only and immutable, with memory-mapped I/O. Each thread gets its own
+# connection, opened on its first query, so lookups can run from threaded
+# workers and importing the modules does not touch the database. Queries are
+# kept as constant strings by the callers so the connection statement cache
+# prepares each of them once.
+
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable
+
+DB_FILE = 'custom_sources.sqlite'
+
+MMAP_SIZE = 64 * 1024 * 1024 # bytes
+CACHED_STATEMENTS = 128
+IN_SIZE = 64 # names per batched lookup query
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def get_db_path() -> str:
+    """Path of the database file in the package data, resolved on first use"""
+    # Imported here, importlib.resources alone doubles the module import time
+    import importlib.resources
+    try:
+        files = importlib.resources.files
+    except AttributeError:
+        # Python < 3.9, the package data is a file of the installed package
+        with importlib.resources.path('bdqc_taxa', DB_FILE) as path:
+            return str(path)
+    return str(files('bdqc_taxa').joinpath(DB_FILE))
+
+
+def __getattr__(name):
+    # Nothing is resolved or opened when the module is imported
+    if name == 'db_path':
+        return get_db_path()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def connect() -> sqlite3.Connection:
+    """Open a new read-only connection to the database"""
+    from pathlib import Path
+    uri = Path(get_db_path()).resolve().as_uri() + "?mode=ro&immutable=1"
+    conn = sqlite3.connect(
+        uri, uri=True, cached_statements=CACHED_STATEMENTS)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return the connection of the current thread"""
+    try:
+        return _local.conn
+    except AttributeError:
+        _local.conn = connect()
+        return _local.conn
+
+
+def execute(sql: str, parameters=()) -> sqlite3.Cursor:
+    """Execute a query on the connection of the current thread"""
+    return get_connection().execute(sql, parameters)
+
+
+def close():
+    """Close the connection of the current thread"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        del _local.conn
+
+
+def first_rows(table: str, column: str, order_by: str,
+               names: Iterable[str]) -> Dict[str, tuple]:
+    """Return {name: first row} of the lookup of many names in `table`
+
+    The rows are those of `SELECT * FROM table WHERE column = ? ORDER BY
+    order_by` for each name, found with one `IN` query per `IN_SIZE` names.
+    Names without a row are left out.
+    """
+    names = list(dict.fromkeys(names))
+    out = {}
+    for i in range(0, len(names), IN_SIZE):
+        chunk = names[i:i + IN_SIZE]
+        # Chunks are padded with NULL, which matches no row, to a power of
+        # two so that few statements are prepared per table
+        size = 1 << (len(chunk) - 1).bit_length()
+        c = execute(_in_sql(table, column, order_by, size),
+                    chunk + [None] * (size - len(chunk)))
+        position = _column_position(table, column)
+        for row in c:
+            out.setdefault(row[position], row)
+        c.close()
+    return out
+
+
+@lru_cache(maxsize=None)
+def _in_sql(table: str, column: str, order_by: str, size: int) -> str:
+    return (f'SELECT * FROM "{table}" WHERE "{column}" IN '
+            f'({", ".join("?" * size)}) ORDER BY "{column}", "{order_by}", rowid')
+
+
+@lru_cache(maxsize=None)
+def _column_position(table: str, column: str) -> int:
+    c = execute(f'SELECT * FROM "{table}" LIMIT 0')
+    position = [desc[0] for desc in c.description].index(column)
+    c.close()
+    return position
@@ -17,17 +17,27 @@
 #====================================================================================================
 
 
-import sqlite3
-import importlib.resources
+from . import custom_sources
+from . import memory_index
 
-# Get the database file from the package data
+DB_FILE = custom_sources.DB_FILE
 
-DB_FILE = 'custom_sources.sqlite'
-with importlib.resources.open_binary('bdqc_taxa', DB_FILE) as db_file:
-    db_path = db_file.name
 
-# Connect to the database
-conn = sqlite3.connect(db_path)
+def __getattr__(name):
+    # Module attributes of earlier versions, resolved on use. `conn` is the
+    # read-only connection of the calling thread.
+    if name == 'db_path':
+        return custom_sources.get_db_path()
+    if name == 'conn':
+        return custom_sources.get_connection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+MATCH_SQL = '''
+    SELECT * FROM eliso_invertebrates
+    WHERE taxa_name = ?
+    ORDER BY taxa_rank
+    '''
 
 def match_taxa(name) -> dict:
     """Match a species name to Eliso's invertebrate database
@@ -51,23 +61,18 @@ def match_taxa(name) -> dict:
         
     """
 
-    # Get the cursor
-    c = conn.cursor()
-
     # Get the species name
     name = name.strip()
-    
-    c.execute('''
-    SELECT * FROM eliso_invertebrates
-    WHERE taxa_name = ?
-    ORDER BY taxa_rank
-    ''', (name,))
 
     # Get the first result
-    result = c.fetchone()
+    if memory_index.is_enabled():
+        result = memory_index.first_row('eliso_invertebrates', name)
+    else:
+        c = custom_sources.execute(MATCH_SQL, (name,))
+        result = c.fetchone()
 
-    # Close the cursor
-    c.close()
+        # Close the cursor
+        c.close()
 
 
     # If there is a match, return the result
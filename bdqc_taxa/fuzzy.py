@@ -0,0 +1,151 @@
+# Local fuzzy matching of scientific names against the custom sources
+#
+# A trigram index of the Bryoquel, CDPNQ and Eliso scientific names is built
+# from the custom_sources sqlite database on first use. Candidates sharing
+# enough trigrams with the query are then verified with a bounded
+# Levenshtein distance, so misspellings resolve offline.
+
+from typing import Dict, List, Sequence
+
+from . import custom_sources
+
+MAX_DISTANCE = 2
+LIMIT = 5
+
+# Scientific name column of each table, by source name
+TABLES = {
+    'Bryoquel': [('bryoquel', 'scientific_name')],
+    'CDPNQ': [('cdpnq_odonates', 'name'), ('cdpnq_vertebrates', 'name')],
+    'Eliso': [('eliso_invertebrates', 'taxa_name')],
+}
+
+SOURCES = tuple(TABLES.keys())
+
+# Trigram index, loaded on first use
+_names = None # [(source, name, normalized name)]
+_trigrams = None # {trigram: [index in _names]}
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def _name_trigrams(name: str) -> set:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _load_index():
+    global _names, _trigrams
+    if _names is not None:
+        return _names, _trigrams
+
+    names = []
+    seen = set()
+    for source, tables in TABLES.items():
+        for table, column in tables:
+            c = custom_sources.execute(f'SELECT "{column}" FROM "{table}"')
+            for (name,) in c.fetchall():
+                if not isinstance(name, str) or (source, name) in seen:
+                    continue
+                seen.add((source, name))
+                names.append((source, name, _normalize(name)))
+            c.close()
+
+    trigrams = {}
+    for i, (_, _, normalized) in enumerate(names):
+        for trigram in _name_trigrams(normalized):
+            trigrams.setdefault(trigram, []).append(i)
+
+    _names, _trigrams = names, trigrams
+    return _names, _trigrams
+
+
+def levenshtein(a: str, b: str, max_distance: int = None) -> int:
+    """Edit distance between two strings
+
+    If `max_distance` is given, returns `max_distance + 1` as soon as the
+    distance is known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def match(name: str, max_distance: int = MAX_DISTANCE, limit: int = LIMIT,
+          sources: Sequence[str] = SOURCES) -> List[dict]:
+    """Find the custom sources names closest to `name`
+
+    Parameters
+    ----------
+    name : str
+        The scientific name to match
+    max_distance : int
+        The maximum edit distance of the returned names
+    limit : int
+        The maximum number of returned names
+    sources : list of str
+        The sources to search, among 'Bryoquel', 'CDPNQ' and 'Eliso'
+
+    Returns
+    -------
+    list of dict
+        Candidates ordered by edit distance, with the following keys:
+        - source: the source name
+        - name: the matched scientific name
+        - distance: the edit distance to the input name
+        - match_type: 'exact' if the distance is 0, else 'fuzzy'
+    """
+    for source in sources:
+        if source not in TABLES:
+            raise ValueError(f"Source '{source}' is not in {SOURCES}.")
+
+    query = _normalize(name)
+    if not query:
+        return []
+
+    names, trigrams = _load_index()
+
+    # Count the trigrams shared by each name
+    shared: Dict[int, int] = {}
+    query_trigrams = _name_trigrams(query)
+    for trigram in query_trigrams:
+        for i in trigrams.get(trigram, ()):
+            shared[i] = shared.get(i, 0) + 1
+
+    # Each edit changes at most 3 trigrams
+    min_shared = max(1, len(query_trigrams) - 3 * max_distance)
+
+    out = []
+    for i, count in shared.items():
+        if count < min_shared:
+            continue
+        source, candidate, normalized = names[i]
+        if source not in sources:
+            continue
+        distance = levenshtein(query, normalized, max_distance)
+        if distance > max_distance:
+            continue
+        out.append({
+            'source': source,
+            'name': candidate,
+            'distance': distance,
+            'match_type': 'exact' if distance == 0 else 'fuzzy',
+        })
+
+    out.sort(key=lambda x: (x['distance'], x['name'], x['source']))
+    return out[:limit]
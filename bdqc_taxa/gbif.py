@@ -1,10 +1,11 @@
-from urllib.request import Request, urlopen, URLError, HTTPError
-from urllib.parse import urlencode, quote_plus 
-import json
 from inspect import signature
+from . import _transport
+from . import cache
+from . import _pool
 
 HOST = "https://api.gbif.org"
 LIMIT = 100
+MAX_LIMIT = 1000 # Largest page size accepted by the API
 RESP_RESULT_KEY = 'results'
 
 
@@ -16,47 +17,68 @@ def _get_url_data(url, params: dict = None, limit: int = None, offset: int = 0):
             "limit": limit,
             "offset": offset
         })
-    req = Request(
-        url=f"{url}?{urlencode(params)}",
+    return cache.cached(
+        'gbif', lambda: _fetch_url_data(url, params), url, params)
+
+def _fetch_url_data(url, params: dict = None):
+    # Raises policy.RemoteSourceError once retries are exhausted
+    data = _transport.request(
+        "GET", url, params,
         headers={"Content-Type": "application/json"})
-    try:
-        data = urlopen(req)
-    except HTTPError as e:
-        return e
-    except URLError as e:
-        if hasattr(e, 'reason'):
-            return e.reason
-        elif hasattr(e, 'code'):
-            return e.code
-        else:
-            return e
-    else:
-        try:
-            out = json.loads(data.read().decode('utf-8'))
-            return out
-        except KeyError:
-            return [None]
+    return data.json()
 
 def _pagin_get_url_data(url, params: dict = None, limit: int = LIMIT,
     resp_result_key = RESP_RESULT_KEY):
+    return list(_iter_pages(url, params, limit, resp_result_key))
+
+def _iter_pages(url, params: dict = None, limit: int = LIMIT,
+    resp_result_key = RESP_RESULT_KEY):
+    """Yield the results of all the pages of `url`, in order
+
+    The `count` of the first page gives the remaining offsets, which are
+    fetched concurrently. Pages are fetched one after the other if the
+    response has no `count`.
+    """
+    limit = min(limit, MAX_LIMIT)
+    resp = _get_url_data(url, dict(params or {}), limit = limit, offset = 0)
+    yield from resp[resp_result_key]
+    if resp["endOfRecords"]:
+        return
 
-    end_of_records = False
-    offset = 0
-    results = []
-    while not end_of_records:
-        resp = _get_url_data(url, params, limit = LIMIT, offset = offset)
-        end_of_records = resp["endOfRecords"]
-        offset += limit
-        results.extend(resp[resp_result_key])
-    return results
+    count = resp.get("count")
+    if count is None:
+        offset = limit
+        end_of_records = False
+        while not end_of_records:
+            resp = _get_url_data(url, dict(params or {}), limit = limit, offset = offset)
+            end_of_records = resp["endOfRecords"]
+            offset += limit
+            yield from resp[resp_result_key]
+        return
+
+    executor = _pool.get_executor(_pool.REQUESTS)
+    futures = [
+        executor.submit(_get_url_data, url, dict(params or {}), limit, offset)
+        for offset in range(limit, count, limit)]
+    try:
+        for future in futures:
+            yield from future.result()[resp_result_key]
+    finally:
+        # Stopped early by the consumer
+        for future in futures:
+            future.cancel()
 
 
 class Species:
     @classmethod
-    def get_vernacular_name(cls, species_id: int):
+    def get_vernacular_name(cls, species_id: int, limit: int = LIMIT):
+        return list(cls.iter_vernacular_names(species_id, limit))
+
+    @classmethod
+    def iter_vernacular_names(cls, species_id: int, limit: int = LIMIT):
+        """Yield the vernacular names of a species, pages being fetched concurrently"""
         url = f"{HOST}/v1/species/{species_id}/vernacularNames"
-        results = _pagin_get_url_data(url)
-        return results
+        return _iter_pages(url, limit = limit)
 
 
     @classmethod
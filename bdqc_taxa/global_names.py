@@ -1,9 +1,11 @@
-from urllib.request import Request, urlopen, URLError, HTTPError
-from urllib.parse import urlencode, quote_plus
+from urllib.parse import quote_plus
 from typing import List
 import json
+from . import _transport
+from . import cache
+from .policy import RemoteSourceError
 
-__all__ = ['verify']
+__all__ = ['verify', 'verify_many']
 
 VERIFY_PREFIX = "api/v1/verifications"
 HOST = "https://verifier.globalnames.org"
@@ -12,6 +14,8 @@ DATA_SOURCES = [1, 3, 147]
 
 ALL_MATCHES = True
 
+CHUNK_SIZE = 1000
+
 
 def _verify(name: str, data_sources: list = DATA_SOURCES, all_matches: bool = ALL_MATCHES) -> dict:
     # Format python bool to json bool
@@ -23,35 +27,42 @@ def _verify(name: str, data_sources: list = DATA_SOURCES, all_matches: bool = AL
     path_name = quote_plus(name)
 
 
-    params = urlencode(
-        {'capitalize': "true",
-         'all_matches': all_matches,
-         'data_sources': "|".join(['%.0f' % v for v in data_sources])
-         }
-    )
-
-
-    req = Request(
-        url="/".join([HOST, VERIFY_PREFIX, path_name]) + "?" + params,
-        headers={"Content-Type": "application/json"}
-    )
-    try:
-        data = urlopen(req)
-    except HTTPError as e:
-        return e
-    except URLError as e:
-        if hasattr(e, 'reason'):
-            return e.reason
-        elif hasattr(e, 'code'):
-            return e.code
-        else:
-            return e
-    else:
-        try:
-            out = json.loads(data.read().decode('utf-8'))
-            return out
-        except KeyError:
-            return [None]
+    url = "/".join([HOST, VERIFY_PREFIX, path_name])
+    params = {'capitalize': "true",
+              'all_matches': all_matches,
+              'data_sources': "|".join(['%.0f' % v for v in data_sources])
+              }
+
+    return cache.cached(
+        'global_names', lambda: _request("GET", url, params), url, params)
+
+def _verify_many(names: List[str], data_sources: list = DATA_SOURCES, all_matches: bool = ALL_MATCHES) -> dict:
+    url = "/".join([HOST, VERIFY_PREFIX])
+    payload = {'nameStrings': names,
+               'dataSources': [int(v) for v in data_sources],
+               'withAllMatches': bool(all_matches),
+               'withCapitalization': True
+               }
+
+    def fetch():
+        out = _request("POST", url, body=payload)
+        # Names are matched to the submitted ones by position
+        if len(out.get('names', [])) != len(names):
+            raise RemoteSourceError(
+                f"Expected {len(names)} verified names, "
+                f"got {len(out.get('names', []))}", url=url)
+        return out
+
+    return cache.cached('global_names', fetch, url, body=payload)
+
+def _request(method: str, url: str, params: dict = None, body: dict = None):
+    # Raises policy.RemoteSourceError once retries are exhausted
+    if body is not None:
+        body = json.dumps(body).encode('utf-8')
+    data = _transport.request(
+        method, url, params, body=body,
+        headers={"Content-Type": "application/json"})
+    return data.json()
 
 def _solve_source_name_conflicts(results: List[dict]) -> List[dict]:
     """
@@ -99,6 +110,24 @@ def _solve_authorship_conflicts(results: List[dict]) -> List[dict]:
 
     return out
 
+def _solve_conflicts(name: dict, authorship: str = None) -> dict:
+    try:
+        name['results'] = _solve_source_name_conflicts(name['results'])
+    except KeyError:
+        pass
+    
+    if authorship:
+        try:
+            name['results'] = _solve_authorship_conflicts(name['results'])
+        except KeyError:
+            pass
+    return name
+
+def _with_authorship(name: str, authorship: str = None) -> str:
+    if isinstance(authorship, str) and authorship.strip():
+        name = " ".join([name, authorship])
+    return name
+
 def verify(name: str, authorship: str = None, data_sources: list = DATA_SOURCES, all_matches: bool = ALL_MATCHES) -> List[dict]:
     """
     This function takes a list of names and returns a list of results from the global names verifier.
@@ -108,23 +137,45 @@ def verify(name: str, authorship: str = None, data_sources: list = DATA_SOURCES,
     :param all_matches: Whether to return all matches.
     :return: A list of results from the global names verifier.
     """
-    if isinstance(authorship, str) and authorship.strip():
-            name = " ".join([name, authorship])
+    name = _with_authorship(name, authorship)
             
     gn_out = _verify(name, data_sources, all_matches)
-    names = gn_out['names']
-    for i, name in enumerate(names):
-        try:
-            names[i]['results'] = _solve_source_name_conflicts(name['results'])
-        except KeyError:
-            pass
-        
-        if authorship:
-            try:
-                names[i]['results'] = _solve_authorship_conflicts(name['results'])
-            except KeyError:
-                pass
+    gn_out['names'] = [
+        _solve_conflicts(name, authorship) for name in gn_out['names']]
 
-    gn_out['names'] = names
+    return gn_out
 
-    return gn_out
\ No newline at end of file
+def verify_many(names: List[str], authorships: List[str] = None, data_sources: list = DATA_SOURCES, all_matches: bool = ALL_MATCHES, chunk_size: int = CHUNK_SIZE) -> List[List[dict]]:
+    """
+    This function takes a list of names and posts them in chunks to the global names verifier.
+    Complex names ("A|B") are split into their members, as `verify` does.
+    :param names: A list of names to verify.
+    :param authorships: Authorship of each name to verify.
+    :param data_sources: A list of data sources to use.
+    :param all_matches: Whether to return all matches.
+    :param chunk_size: Maximum number of name strings per request.
+    :return: A list with the verifications of each name, one per member, in input order.
+    """
+    if authorships is None:
+        authorships = [None] * len(names)
+    if len(authorships) != len(names):
+        raise ValueError("names and authorships must have the same length.")
+
+    # The verifier splits a name string on "|" only when it is in the url
+    name_members = [
+        [member.strip() for member in _with_authorship(name, authorship).split('|')]
+        for name, authorship in zip(names, authorships)]
+    name_strings = [member for members in name_members for member in members]
+
+    verified = []
+    for start in range(0, len(name_strings), chunk_size):
+        gn_out = _verify_many(
+            name_strings[start:start + chunk_size], data_sources, all_matches)
+        verified.extend(gn_out['names'])
+
+    out = []
+    verified = iter(verified)
+    for members, authorship in zip(name_members, authorships):
+        out.append([
+            _solve_conflicts(next(verified), authorship) for _ in members])
+    return out
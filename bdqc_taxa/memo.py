@@ -0,0 +1,131 @@
+# In-process memoization of the resolution results
+#
+# A bounded LRU with a time to live, keyed on the bound call arguments.
+# Results are deep copied on the way in and out so callers can mutate the
+# returned objects (e.g. `TaxaRef.match_type`) without altering the cache.
+
+import copy
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from inspect import signature
+
+__all__ = ['memoize', 'skip_caching', 'CacheInfo']
+
+MAXSIZE = 1024
+TTL = 60 * 60 # seconds
+
+_local = threading.local()
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'ttl'])
+
+
+class Memo:
+    def __init__(self, maxsize: int = MAXSIZE, ttl: float = TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) for a valid entry, else (False, None)"""
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            if expires is not None and time.monotonic() > expires:
+                del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return True, copy.deepcopy(value)
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._data), self.ttl)
+
+    def configure(self, maxsize: int = None, ttl: float = None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+                while len(self._data) > max(maxsize, 0):
+                    self._data.popitem(last=False)
+            if ttl is not None:
+                self.ttl = ttl
+
+
+def skip_caching():
+    """Do not cache the result of the memoized call running in this thread
+
+    Called when a result is partial, e.g. when a remote source failed.
+    """
+    _local.skip = True
+
+
+def memoize(maxsize: int = MAXSIZE, ttl: float = TTL):
+    """Memoize a function returning a list of objects
+
+    The wrapped function exposes `cache_clear()`, `cache_info()` and
+    `cache_configure(maxsize, ttl)`. Set `maxsize` to 0 to disable caching.
+    """
+    def decorator(func):
+        memo = Memo(maxsize, ttl)
+        sig = signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if memo.maxsize <= 0:
+                return func(*args, **kwargs)
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple(
+                tuple(sorted(value.items())) if isinstance(value, dict) else value
+                for value in bound.arguments.values())
+            try:
+                found, value = memo.get(key)
+            except TypeError:
+                # Unhashable arguments are not cached
+                return func(*args, **kwargs)
+            if found:
+                return value
+            outer_skip = getattr(_local, 'skip', False)
+            _local.skip = False
+            try:
+                value = func(*args, **kwargs)
+            finally:
+                skip = _local.skip
+                # A partial inner result is also partial for the outer call
+                _local.skip = outer_skip or skip
+            if not skip:
+                memo.set(key, value)
+            return value
+
+        wrapper.cache_clear = memo.clear
+        wrapper.cache_info = memo.info
+        wrapper.cache_configure = memo.configure
+        return wrapper
+    return decorator
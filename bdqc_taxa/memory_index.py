@@ -0,0 +1,129 @@
+# In-memory indexes of the custom sources
+#
+# Opt-in mode where the bryoquel, cdpnq and eliso lookups are answered from
+# dicts loaded once from the custom_sources sqlite database instead of
+# querying it. Each table is loaded on first use into a {name: row} dict
+# holding the row the SQL lookup returns, so results are identical.
+
+import sys
+import threading
+
+from . import custom_sources
+
+__all__ = ['enable', 'disable', 'is_enabled', 'load', 'first_row', 'first_rows',
+           'footprint']
+
+# Lookup column and ORDER BY column, by table
+LOOKUPS = {
+    'bryoquel': ('scientific_name', 'taxon_rank'),
+    'cdpnq_odonates': ('name', 'rank'),
+    'cdpnq_vertebrates': ('name', 'rank'),
+    'eliso_invertebrates': ('taxa_name', 'taxa_rank'),
+}
+
+_enabled = False
+_indexes = {} # {table: {name: row}}
+_lock = threading.Lock()
+
+
+def enable(preload: bool = False):
+    """Answer the custom sources lookups from memory
+
+    Tables are loaded on first use, or right away if `preload` is True.
+    """
+    global _enabled
+    _enabled = True
+    if preload:
+        load()
+
+
+def disable():
+    """Query the sqlite database again and free the loaded indexes"""
+    global _enabled
+    _enabled = False
+    with _lock:
+        _indexes.clear()
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _load_table(table: str) -> dict:
+    column, order_by = LOOKUPS[table]
+    # Same order as the lookup queries, which scan the (column, order_by)
+    # index: ties are returned by rowid
+    c = custom_sources.execute(
+        f'SELECT * FROM "{table}" ORDER BY "{column}", "{order_by}", rowid')
+    index = {}
+    position = [desc[0] for desc in c.description].index(column)
+    for row in c:
+        # NULL never equals the looked up name
+        name = row[position]
+        if name is not None and name not in index:
+            index[name] = row
+    c.close()
+    return index
+
+
+def _get_index(table: str) -> dict:
+    index = _indexes.get(table)
+    if index is None:
+        with _lock:
+            index = _indexes.get(table)
+            if index is None:
+                index = _indexes[table] = _load_table(table)
+    return index
+
+
+def load(tables=None):
+    """Load the indexes of `tables`, all tables by default"""
+    for table in tables or LOOKUPS:
+        _get_index(table)
+
+
+def first_row(table: str, name: str):
+    """Return the row the lookup query of `table` returns for `name`, or None"""
+    return _get_index(table).get(name)
+
+
+def first_rows(table: str, names) -> dict:
+    """Return {name: first row} for the `names` found in `table`"""
+    index = _get_index(table)
+    return {name: index[name] for name in names if name in index}
+
+
+def _sizeof(obj, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            _sizeof(key, seen) + _sizeof(value, seen)
+            for key, value in obj.items())
+    elif isinstance(obj, (tuple, list)):
+        size += sum(_sizeof(item, seen) for item in obj)
+    return size
+
+
+def footprint() -> dict:
+    """Memory used by the loaded indexes
+
+    Returns
+    -------
+    dict
+        {table: {'rows': number of indexed names, 'bytes': size in bytes}}
+        for each loaded table, and a 'total' entry
+    """
+    out = {}
+    seen = set()
+    with _lock:
+        indexes = dict(_indexes)
+    for table, index in indexes.items():
+        out[table] = {'rows': len(index), 'bytes': _sizeof(index, seen)}
+    out['total'] = {
+        'rows': sum(x['rows'] for x in out.values()),
+        'bytes': sum(x['bytes'] for x in out.values()),
+    }
+    return out
@@ -0,0 +1,126 @@
+# PostgreSQL COPY writer for TaxaRef results
+#
+# Streams refs, or refs by input name, as COPY text or CSV rows to any
+# file-like object, a chunk of rows at a time, e.g. with psycopg2
+#
+#   results = ((name, TaxaRef.from_all_sources(name)) for name in names)
+#   buffer = io.StringIO()
+#   write_copy(results, buffer, format='csv')
+#   buffer.seek(0)
+#   cursor.copy_expert(copy_statement('taxa_ref', format='csv', named=True), buffer)
+
+from typing import Iterator, Sequence
+
+from .columnar import COLUMNS, INPUT_NAME, Results, _iter_rows
+
+__all__ = ['FORMATS', 'array_literal', 'iter_copy', 'write_copy', 'copy_statement']
+
+FORMATS = ('text', 'csv')
+CHUNK_SIZE = 1000
+
+_TEXT_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+_ARRAY_SPECIAL = set('{},"\\') | set(' \t\n\r\v\f')
+
+
+def _array_element(value) -> str:
+    if value is None:
+        return 'NULL'
+    value = str(value)
+    if (not value or value.upper() == 'NULL'
+            or any(char in _ARRAY_SPECIAL for char in value)):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return value
+
+
+def array_literal(values: Sequence) -> str:
+    """Format a list as a PostgreSQL array literal, e.g. '{1,"a b",NULL}'"""
+    return '{' + ','.join(_array_element(value) for value in values) + '}'
+
+
+def _value(value):
+    """The value as a string, or None for NULL"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, tuple)):
+        return array_literal(value)
+    return str(value)
+
+
+def _text_field(value) -> str:
+    value = _value(value)
+    return '\\N' if value is None else value.translate(_TEXT_ESCAPES)
+
+
+def _csv_field(value) -> str:
+    value = _value(value)
+    if value is None:
+        # Unquoted empty field
+        return ''
+    if (not value or value == '\\.'
+            or any(char in value for char in ',"\n\r')):
+        # Quoted, so that empty strings are not read as NULL
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def iter_copy(results: Results, format: str = 'text') -> Iterator[str]:
+    """Yield the results as COPY rows, newline terminated
+
+    Parameters
+    ----------
+    results : iterable of TaxaRef, dict or iterable of (name, list of TaxaRef)
+        The refs, or the refs by input name, in which case an `input_name`
+        last column is added (see `columnar.iter_columns`)
+    format : str
+        The COPY format, 'text' or 'csv', with default options
+
+    Yields
+    ------
+    str
+        A row, with the columns of `columnar.COLUMNS`
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Format '{format}' is not in {FORMATS}.")
+    field, delimiter = (_text_field, '\t') if format == 'text' else (_csv_field, ',')
+    _, rows = _iter_rows(results)
+    for row in rows:
+        yield delimiter.join(map(field, row)) + '\n'
+
+
+def write_copy(results: Results, file, format: str = 'text',
+               chunk_size: int = CHUNK_SIZE) -> int:
+    """Write the results as COPY rows to the text file-like `file`
+
+    Rows are written `chunk_size` at a time. Returns the number of rows.
+    """
+    count = 0
+    chunk = []
+    for line in iter_copy(results, format):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            file.write(''.join(chunk))
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        file.write(''.join(chunk))
+        count += len(chunk)
+    return count
+
+
+def copy_statement(table: str, format: str = 'text', named: bool = False) -> str:
+    """The `COPY ... FROM STDIN` statement matching the written rows
+
+    Set `named` if the results are refs by input name.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Format '{format}' is not in {FORMATS}.")
+    columns = (*COLUMNS, INPUT_NAME) if named else COLUMNS
+    columns = ', '.join(f'"{column}"' for column in columns)
+    return f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT {format})"
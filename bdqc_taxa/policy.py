@@ -0,0 +1,277 @@
+# Request policy of the remote sources (GBIF, Global Names, Wikidata)
+#
+# Every request sent by `_transport` goes through the policy of its host:
+# a token bucket bounds the request rate, 429 and 5xx responses and network
+# errors are retried with exponential backoff and full jitter (honouring
+# `Retry-After`), and a circuit breaker fails fast once a host keeps
+# failing, until a trial request succeeds again.
+#
+# Failed requests raise `RemoteSourceError`, a `URLError` carrying the host,
+# the HTTP status and whether the failure is worth retrying later.
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.error import URLError
+
+__all__ = ['RemoteSourceError', 'CircuitOpenError', 'TokenBucket',
+           'CircuitBreaker', 'HostPolicy', 'get_policy', 'configure', 'reset',
+           'stats']
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# Default policy parameters, overridden per host in HOST_POLICIES
+DEFAULTS = {
+    'rate': 10.0, # requests per second
+    'burst': 20, # requests
+    'max_retries': 3,
+    'backoff_base': 0.5, # seconds
+    'backoff_max': 30.0, # seconds
+    'failure_threshold': 5, # consecutive failures opening the circuit
+    'reset_timeout': 30.0, # seconds before a trial request
+}
+
+HOST_POLICIES = {
+    'api.gbif.org': {'rate': 20.0, 'burst': 40},
+    'verifier.globalnames.org': {'rate': 10.0, 'burst': 20},
+    'www.wikidata.org': {'rate': 5.0, 'burst': 10},
+}
+
+
+class RemoteSourceError(URLError):
+    """A remote source request that failed, after retries if any
+
+    Attributes
+    ----------
+    host : str
+        The requested host
+    url : str
+        The requested url
+    status : int or None
+        The HTTP status, None for network errors and open circuits
+    attempts : int
+        The number of requests sent
+    retryable : bool
+        True for throttling, server and network errors
+    """
+    def __init__(self, reason, host: str = None, url: str = None,
+                 status: int = None, attempts: int = 1,
+                 retryable: bool = False, retry_after: float = None):
+        super().__init__(reason)
+        self.host = host
+        self.url = url
+        self.status = status
+        self.attempts = attempts
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+    @property
+    def code(self):
+        return self.status
+
+    def __str__(self):
+        status = f" {self.status}" if self.status else ""
+        return f"<RemoteSourceError{status} {self.url}: {self.reason}>"
+
+
+class CircuitOpenError(RemoteSourceError):
+    """Raised without sending the request while the host circuit is open"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket, `acquire` blocks until a token is available
+
+    `clock` and `sleep` default to `time.monotonic` and `time.sleep`.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable = None,
+                 sleep: Callable = None):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock or time.monotonic
+        self._sleep = sleep or time.sleep
+        self._tokens = float(burst)
+        self._updated = self._clock()
+        self._lock = threading.Lock()
+
+    def _wait_time(self) -> float:
+        now = self._clock()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        if self.rate is None or self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                wait = self._wait_time()
+            if not wait:
+                return
+            self._sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures
+
+    While open, requests fail fast. After `reset_timeout` seconds a single
+    trial request is let through (half open): its success closes the
+    circuit, its failure opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN \
+                    and time.monotonic() - self._opened >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Open, or half open with the trial request in flight
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN \
+                    or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened = time.monotonic()
+
+
+class HostPolicy:
+    def __init__(self, host: str, rate: float = DEFAULTS['rate'],
+                 burst: int = DEFAULTS['burst'],
+                 max_retries: int = DEFAULTS['max_retries'],
+                 backoff_base: float = DEFAULTS['backoff_base'],
+                 backoff_max: float = DEFAULTS['backoff_max'],
+                 failure_threshold: int = DEFAULTS['failure_threshold'],
+                 reset_timeout: float = DEFAULTS['reset_timeout']):
+        self.host = host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Seconds to wait before the retry following `attempt` (from 1)"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def call(self, send: Callable, url: str = None):
+        """Call `send()` under the policy and return its result
+
+        `send` raises `RemoteSourceError` on failure; failures that are
+        `retryable` are retried, then count against the circuit breaker.
+        Other exceptions are not retried and count against it.
+        """
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError(
+                f"circuit open for {self.host}", host=self.host, url=url,
+                attempts=0, retryable=True)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.bucket.acquire()
+            self._count('requests')
+            try:
+                out = send()
+            except RemoteSourceError as e:
+                e.attempts = attempt
+                if not e.retryable:
+                    # The host answered, e.g. 404
+                    self.breaker.record_success()
+                    raise
+                if attempt > self.max_retries:
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    raise
+                self._count('retries')
+                time.sleep(self.backoff(attempt, e.retry_after))
+            except BaseException:
+                # Any other error, e.g. KeyboardInterrupt, must not leave a
+                # trial request pending with the circuit half open
+                self._count('failures')
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return out
+
+
+_policies: Dict[str, HostPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(host: str) -> HostPolicy:
+    with _policies_lock:
+        try:
+            return _policies[host]
+        except KeyError:
+            policy = HostPolicy(host, **{**DEFAULTS, **HOST_POLICIES.get(host, {})})
+            _policies[host] = policy
+            return policy
+
+
+def configure(host: Optional[str] = None, **params):
+    """Set policy parameters (see `DEFAULTS`) for `host`, or for all hosts
+
+    Policies are recreated on their next request.
+    """
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown policy parameters: {sorted(unknown)}")
+    if host is None:
+        DEFAULTS.update(params)
+    else:
+        HOST_POLICIES[host] = {**HOST_POLICIES.get(host, {}), **params}
+    with _policies_lock:
+        if host is None:
+            _policies.clear()
+        else:
+            _policies.pop(host, None)
+
+
+def reset():
+    """Forget the rate, circuit and stats of all hosts"""
+    with _policies_lock:
+        _policies.clear()
+
+
+def stats() -> Dict[str, dict]:
+    """Requests, retries, failures and rejected requests, and circuit state, by host"""
+    with _policies_lock:
+        policies = dict(_policies)
+    return {
+        host: {**policy.stats, 'circuit': policy.breaker.state}
+        for host, policy in policies.items()}
@@ -4,8 +4,15 @@ from . import global_names
 from . import gbif
 from . import bryoquel
 from . import cdpnq
-from typing import List
-from inspect import signature
+from . import memo
+from . import fuzzy
+from . import _pool
+from .policy import RemoteSourceError
+from typing import Dict, List, Union
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
 
 GBIF_SOURCE_KEY = 11 # Corresponds to global names
 BRYOQUEL_SOURCE_KEY = 1001 # Not in global names so start at 1000
@@ -19,6 +26,9 @@ GBIF_RANKS = ['kingdom', 'phylum', 'class', 'order', 'family',
 
 DATA_SOURCES = [1, 3, 147] # COL, ITIS, VASCAN
 
+# Build GBIF rows from the match response when possible, see `TaxaRef.from_gbif`
+GBIF_FROM_MATCH = False
+
 SOURCES_PARENT_CLASSIFICATION_SRIDS = [
     # Only vascular plants
     {
@@ -46,7 +56,34 @@ SOURCES_PARENT_CLASSIFICATION_SRIDS = [
     }
 ]
 
+
+def _parent_taxa_sources(sources: List[dict]) -> Dict[str, set]:
+    """Map each parent taxa name to the sources kept whole when pruning for it"""
+    out = {}
+    for source in sources:
+        for scientific_name in source['scienfitic_name']:
+            out.setdefault(scientific_name, set()).add(source['source_name'])
+    return out
+
+PARENT_TAXA_SOURCES = _parent_taxa_sources(SOURCES_PARENT_CLASSIFICATION_SRIDS)
+
+
 class TaxaRef:
+    """A taxon record of a source
+
+    Refs compare and hash by `key()`. The `KEY_FIELDS` of a ref must not be
+    changed once it is held in a set or used as a dict key.
+    """
+    # Attributes, in the order of `to_dict()` and `to_tuple()`
+    FIELDS = ('id', 'source_id', 'source_record_id', 'source_name',
+              'scientific_name', 'authorship', 'rank', 'rank_order',
+              'classification_srids', 'valid', 'valid_srid', 'match_type',
+              'is_parent')
+    # Attributes identifying a record, used for equality and hashing
+    KEY_FIELDS = ('source_id', 'source_record_id', 'valid_srid')
+
+    __slots__ = FIELDS
+
     def __init__(self,
                  scientific_name: str = '',
                  id: int = None,
@@ -61,9 +98,19 @@ class TaxaRef:
                  valid_srid: str = '',
                  match_type: str = '',
                  is_parent: bool = None):
-        for param in signature(self.__init__).parameters:
-            setattr(self, param, eval(param))
+        self.id = id
+        self.source_id = source_id
+        self.source_record_id = source_record_id
+        self.source_name = source_name
+        self.scientific_name = scientific_name
+        self.authorship = authorship
         self.rank = rank.lower()
+        self.rank_order = rank_order
+        self.classification_srids = classification_srids
+        self.valid = valid
+        self.valid_srid = valid_srid
+        self.match_type = match_type
+        self.is_parent = is_parent
 
     def __repr__(self):
         return f"{self.__class__.__name__}(\'{self.scientific_name}\')"
@@ -71,8 +118,23 @@ class TaxaRef:
     def __str__(self):
         return self.scientific_name
 
-    @property
-    def __dict__(self):
+    def __eq__(self, other):
+        if not isinstance(other, TaxaRef):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self) -> tuple:
+        """The identifying attributes of the record, see `KEY_FIELDS`
+
+        Attributes are not frozen, a ref hashed before changing one of them
+        is then lost from its set or dict.
+        """
+        return (self.source_id, self.source_record_id, self.valid_srid)
+
+    def to_dict(self) -> dict:
         return {
             "id": self.id,
             "source_id": self.source_id,
@@ -89,13 +151,61 @@ class TaxaRef:
             "is_parent": self.is_parent
         }
 
+    def to_tuple(self) -> tuple:
+        return (self.id, self.source_id, self.source_record_id,
+                self.source_name, self.scientific_name, self.authorship,
+                self.rank, self.rank_order, self.classification_srids,
+                self.valid, self.valid_srid, self.match_type, self.is_parent)
+
+    def fields_key(self) -> tuple:
+        """All the attributes as a hashable tuple, to find duplicate refs"""
+        srids = self.classification_srids
+        return (self.id, self.source_id, self.source_record_id,
+                self.source_name, self.scientific_name, self.authorship,
+                self.rank, self.rank_order,
+                tuple(srids) if isinstance(srids, list) else srids,
+                self.valid, self.valid_srid, self.match_type, self.is_parent)
+
+    # Instances are slotted, `__dict__` and `vars()` return a new dict
+    @property
+    def __dict__(self):
+        return self.to_dict()
+
+    # No instance `__dict__`, so copy and pickle need explicit state
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
     @classmethod
     def from_global_names(cls, name: str, authorship: str = None, data_sources: List[int] = None):
         if data_sources is None:
             data_sources = DATA_SOURCES
 
         gn_results = global_names.verify(name, authorship, data_sources=data_sources)
-        gn_results = gn_results['names']
+        return cls._from_global_names_results(gn_results['names'])
+
+    @classmethod
+    def from_global_names_batch(cls, names: List[str], authorships: List[str] = None,
+                                data_sources: List[int] = None) -> List[List[TaxaRef]]:
+        """
+        Match many names against Global Names using bulk verification requests.
+        :param names: Names to match.
+        :param authorships: Authorship of each name.
+        :param data_sources: A list of data sources to use.
+        :return: A list with the TaxaRef of each name, in input order.
+        """
+        if data_sources is None:
+            data_sources = DATA_SOURCES
+
+        gn_names = global_names.verify_many(
+            names, authorships, data_sources=data_sources)
+        return [cls._from_global_names_results(members) for members in gn_names]
+
+    @classmethod
+    def _from_global_names_results(cls, gn_results: List[dict]):
         try:
             gn_results = [
                 result for species in gn_results 
@@ -163,21 +273,39 @@ class TaxaRef:
         return out
 
     @classmethod
-    def from_gbif(cls, name: str, authorship: str = None):
-        out = []
+    def from_gbif(cls, name: str, authorship: str = None, from_match: bool = None):
+        """
+        Match a name against the GBIF Backbone Taxonomy.
+        :param name: Name to match, or complex name with `|` separated names.
+        :param authorship: Authorship of the name.
+        :param from_match: Build the rows of accepted names from the match
+            response instead of fetching their record, and fetch both records
+            of synonyms concurrently. Defaults to `GBIF_FROM_MATCH`.
+        :return: A list of TaxaRef.
+        """
+        if from_match is None:
+            from_match = GBIF_FROM_MATCH
         names = [v.strip() for v in name.split("|")]
-        for name in names:
-            out.extend(cls._from_gbif_singleton(name, authorship))
-        
-        return out
+
+        # Distinct members of a complex name are matched once, concurrently
+        unique_names = list(dict.fromkeys(names))
+        refs = _pool.map_sources(
+            lambda name: cls._from_gbif_singleton(name, authorship, from_match),
+            unique_names)
+
+        return _member_refs(names, dict(zip(unique_names, refs)))
 
     @classmethod
-    def _from_gbif_singleton(cls, name: str, authorship: str = None):
+    def _from_gbif_singleton(cls, name: str, authorship: str = None,
+                             from_match: bool = False):
         if isinstance(authorship, str) and authorship.strip():
             name =" ".join([name, authorship])
         match_species = gbif.Species.match(name)
         try:
-            result: dict = gbif.Species.get(match_species['usageKey'])
+            if from_match:
+                result, accepted = _gbif_match_records(match_species)
+            else:
+                result, accepted = gbif.Species.get(match_species['usageKey']), None
         except KeyError:
             return []
         is_valid = "acceptedKey" not in result.keys()
@@ -215,7 +343,9 @@ class TaxaRef:
                 "is_parent": is_parent
             }
             out.append(cls(**out_kwargs))
-            result = gbif.Species.get(match_species['acceptedUsageKey'])
+            if accepted is None:
+                accepted = gbif.Species.get(match_species['acceptedUsageKey'])
+            result = accepted
 
         # Create rows for valid taxon
         classification_srids = [
@@ -281,41 +411,34 @@ class TaxaRef:
     
     @classmethod
     def _prune_parent_taxa(cls, taxa_ref_list: List[TaxaRef], parent_taxa: str):
-        out = []
-        # List of ids of taxa_ref rows to keep corresponding to the parent taxa
-        parent_srids = []
+        # Ids of the parent taxa rows and ids of taxa_ref rows to keep
+        parent_srids = set()
         keep_ids = set()
 
         # Find branches with parent_srids
         for ref in taxa_ref_list:
             if ref.scientific_name == parent_taxa:
-                # Extend set of parent_srids
-                parent_srids.append(ref.source_record_id)
+                parent_srids.add(ref.source_record_id)
 
                 # Extend grand_parent_srids
                 keep_ids.update(ref.classification_srids[:-1])
 
+        # Sources without whole branch starting from kingdom, kept for this parent
+        parent_sources = PARENT_TAXA_SOURCES.get(parent_taxa, ())
 
-        # Find whole branches with parents srids
         for ref in taxa_ref_list:
-            # Keep all nodes in branches with parent_srids and add to keep_names
-            if any([srid in ref.classification_srids for srid in parent_srids if ref.classification_srids]):
+            # Keep all nodes in branches with parent_srids
+            if ref.classification_srids \
+                    and not parent_srids.isdisjoint(ref.classification_srids):
                 keep_ids.update(ref.classification_srids)
 
-        # Special cases for sources without whole branch starting from kingdom
-        for ref in taxa_ref_list:
-            for source in SOURCES_PARENT_CLASSIFICATION_SRIDS:
-                # Check if parent is listed for sources without whole branch
-                if ref.source_name == source['source_name'] and \
-                        parent_taxa in source['scienfitic_name']:
-                    # Add ref to keep_ids
-                    keep_ids.update([ref.source_record_id])
+            # Special cases for sources without whole branch starting from kingdom
+            if ref.source_name in parent_sources:
+                keep_ids.add(ref.source_record_id)
 
         # Keep only the rows with ids in keep_ids
-        out = [ref for ref in taxa_ref_list if ref.valid_srid in keep_ids]
-        
-        return out
-    
+        return [ref for ref in taxa_ref_list if ref.valid_srid in keep_ids]
+
     @classmethod
     def from_custom_sources_fuzzy_matched(cls, fuzzy_name: str, match_type: str = None):
         out_custom = []
@@ -335,12 +458,161 @@ class TaxaRef:
         return out_custom
 
     @classmethod
+    def from_custom_sources_fuzzy_matched_many(cls, fuzzy_names: List[tuple]):
+        """
+        Batched `from_custom_sources_fuzzy_matched` of many names.
+        :param fuzzy_names: (fuzzy_name, match_type) pairs.
+        :return: The TaxaRef of all the pairs, in order.
+        """
+        custom = cls._custom_sources_matches([name for name, _ in fuzzy_names])
+
+        out_custom = []
+        for fuzzy_name, match_type in fuzzy_names:
+            for match in cls._from_custom_sources_matches(*custom[fuzzy_name]):
+                if not match.is_parent:
+                    match.match_type = match_type
+                out_custom.append(match)
+
+        return out_custom
+
+    @classmethod
+    def from_custom_sources_many(cls, names: List[str]) -> Dict[str, List[TaxaRef]]:
+        """
+        Match many names against Bryoquel and CDPNQ (exact match only).
+        :param names: Names to match.
+        :return: A dict mapping each name to its Bryoquel then CDPNQ TaxaRef.
+        """
+        custom = cls._custom_sources_matches(names)
+        return {
+            name: cls._from_custom_sources_matches(*matches)
+            for name, matches in custom.items()}
+
+    @classmethod
+    def _custom_sources_matches(cls, names: List[str]) -> Dict[str, tuple]:
+        # Batched lookups, with the valid names of CDPNQ synonyms
+        bryoquel_matches = bryoquel.match_taxa_many(names)
+        cdpnq_matches = cdpnq.resolve_many(names)
+        return {
+            name: (bryoquel_matches[name], cdpnq_matches[name])
+            for name in bryoquel_matches}
+
+    @classmethod
+    def _from_custom_sources_matches(cls, bryoquel_match: dict, cdpnq_matches: List[tuple]):
+        return [*cls._from_bryoquel_match(bryoquel_match),
+                *cls._from_cdpnq_resolved(cdpnq_matches)]
+
+    @classmethod
+    def from_custom_sources_fuzzy(cls, name: str, max_distance: int = fuzzy.MAX_DISTANCE):
+        """
+        Fuzzy match a name against the Bryoquel and CDPNQ names, offline.
+        :param name: Name to match.
+        :param max_distance: Maximum edit distance of the matched names.
+        :return: TaxaRef of the closest names, with a `fuzzy` match_type.
+        """
+        candidates = fuzzy.match(
+            name, max_distance, sources=[BROQUEL_SOURCE_NAME, CDPNQ_SOURCE_NAME])
+        if not candidates:
+            return []
+
+        # Keep all the names at the best distance
+        distance = candidates[0]['distance']
+        match_type = candidates[0]['match_type']
+        names = dict.fromkeys(
+            candidate['name'] for candidate in candidates
+            if candidate['distance'] == distance)
+
+        return cls.from_custom_sources_fuzzy_matched_many(
+            [(fuzzy_name, match_type) for fuzzy_name in names])
+
+    @classmethod
+    @memo.memoize()
     def from_all_sources(cls, name: str, authorship: str = None, parent_taxa: str = None):
-        out = cls.from_global_names(name, authorship)
-        out.extend(cls.from_gbif(name, authorship))
-        out.extend(cls.from_bryoquel(name)) # exact match only
-        out.extend(cls.from_cdpnq(name)) # exact match only
-        
+        # Remote sources run concurrently on the shared pool, GBIF once
+        # per member of a complex name, while the custom sources are queried
+        members = complex_members(name)
+        unique_members = list(dict.fromkeys(members))
+        futures = [_pool.submit(cls.from_global_names, name, authorship)]
+        futures.extend(
+            _pool.submit(cls.from_gbif, member, authorship)
+            for member in unique_members)
+        custom = cls.from_custom_sources_many(unique_members)
+        gn_refs, *gbif_refs = _pool.results(
+            futures,
+            [f"Global Names '{name}'",
+             *[f"GBIF '{member}'" for member in unique_members]],
+            errors=RemoteSourceError)
+
+        out = gn_refs
+        out.extend(_member_refs(members, dict(zip(unique_members, gbif_refs))))
+        out.extend(_member_refs(members, custom))
+
+        return cls._merge_sources(name, out, parent_taxa)
+
+    @classmethod
+    def from_all_sources_batch(cls, names: List[str],
+                               authorships: Union[str, List[str]] = None,
+                               parent_taxa: Union[str, List[str]] = None
+                               ) -> List[List[TaxaRef]]:
+        """
+        Match many names against all sources.
+
+        Repeated (name, authorship, parent_taxa) inputs are resolved once.
+        Results are identical to calling `from_all_sources` for each name.
+        :param names: Names to match.
+        :param authorships: Authorship of each name, or a single authorship for all names.
+        :param parent_taxa: Parent taxa of each name, or a single parent taxa for all names.
+        :return: A list with the TaxaRef of each name, in input order. A same
+            name with another authorship or parent taxa has its own result.
+        """
+        queries = list(zip(
+            names,
+            _broadcast(authorships, len(names)),
+            _broadcast(parent_taxa, len(names))))
+
+        # Dedupe repeated inputs while keeping input order
+        unique_queries = list(dict.fromkeys(queries))
+
+        # Members of complex names are looked up once for the whole batch
+        query_members = [complex_members(name) for name, _, _ in unique_queries]
+        gbif_lookups = list(dict.fromkeys(
+            (member, authorship)
+            for members, (_, authorship, _) in zip(query_members, unique_queries)
+            for member in members))
+
+        # GBIF lookups run on the shared pool during the Global Names requests
+        gbif_futures = [
+            _pool.submit(cls.from_gbif, member, authorship)
+            for member, authorship in gbif_lookups]
+        try:
+            gn_refs = cls.from_global_names_batch(
+                [name for name, _, _ in unique_queries],
+                [authorship for _, authorship, _ in unique_queries])
+        except RemoteSourceError as e:
+            logger.warning("Global Names batch failed: %s", e)
+            gn_refs = [[] for _ in unique_queries]
+        custom = cls.from_custom_sources_many(
+            [member for members in query_members for member in members])
+        gbif_refs = dict(zip(gbif_lookups, _pool.results(
+            gbif_futures, [f"GBIF '{member}'" for member, _ in gbif_lookups],
+            errors=RemoteSourceError)))
+
+        # Shared refs are copied before any is altered by a merge
+        seen_gbif, seen_custom = set(), set()
+        for query, members, out in zip(unique_queries, query_members, gn_refs):
+            _, authorship, _ = query
+            out.extend(_member_refs(
+                [(member, authorship) for member in members], gbif_refs, seen_gbif))
+            out.extend(_member_refs(members, custom, seen_custom))
+
+        results = {}
+        for query, out in zip(unique_queries, gn_refs):
+            name, _, parent = query
+            results[query] = cls._merge_sources(name, out, parent)
+
+        return [results[query] for query in queries]
+
+    @classmethod
+    def _merge_sources(cls, name: str, out: List[TaxaRef], parent_taxa: str = None):
         # Fuzzy match for custom sources
         if not any(ref.source_name in ('CDPNQ', 'Bryoquel') for ref in out):
             fuzzy_names = list({(ref.scientific_name, ref.match_type) for ref in out
@@ -349,8 +621,7 @@ class TaxaRef:
             fuzzy_names = []
         
         if fuzzy_names:
-            for fuzzy_name, match_type in fuzzy_names:
-                out.extend(cls.from_custom_sources_fuzzy_matched(fuzzy_name, match_type))
+            out.extend(cls.from_custom_sources_fuzzy_matched_many(fuzzy_names))
             
         if is_complex(name):
             out = cls.set_complex_match_type(out)
@@ -378,34 +649,23 @@ class TaxaRef:
     @classmethod
     def set_complex_match_type(cls, taxa_ref_list: List[TaxaRef]):
         out = []
-        
-        # Eliminate duplicates
+
+        # Eliminate duplicates, the last of equal refs is kept
         taxa_ref_list = {
-            str(ref.__dict__): ref for ref in taxa_ref_list
+            ref.fields_key(): ref for ref in taxa_ref_list
             }.values()
 
-        source_names = {ref.source_name for ref in taxa_ref_list}
-        source_refs = {source_name: {} for source_name in source_names}
-        source_rank_count = {source_name: {} for source_name in source_names}
-
-        # Store unique refs in dict by source and count rank duplicates (complex)
+        # Store unique refs by source, in order of first appearance
+        source_refs = {}
         for ref in taxa_ref_list:
             try:
-                source_refs[ref.source_name][ref.scientific_name]= ref
+                source_refs[ref.source_name][ref.scientific_name] = ref
             except KeyError:
                 source_refs[ref.source_name] = {ref.scientific_name: ref}
-                source_rank_count[ref.source_name] = {}
-
-            try:
-                source_rank_count[ref.source_name][str(ref.rank_order)] += 1
-            except KeyError:
-                source_rank_count[ref.source_name][str(ref.rank_order)] = 1
 
-        for source in source_refs.keys():
+        for refs in source_refs.values():
             # order refs by rank order
-            source_set = sorted(
-                source_refs[source].values(), key = lambda x: x.rank_order
-                )
+            source_set = sorted(refs.values(), key = lambda x: x.rank_order)
             # Set match_type by their position in rank_order
             complex_switch = False
             for i, ref in enumerate(source_set):
@@ -423,7 +683,10 @@ class TaxaRef:
 
     @classmethod
     def from_bryoquel(cls, name: str):
-        match_taxa = bryoquel.match_taxa(name)
+        return cls._from_bryoquel_match(bryoquel.match_taxa(name))
+
+    @classmethod
+    def _from_bryoquel_match(cls, match_taxa: dict):
         if match_taxa is None:
             return []
         
@@ -478,14 +741,17 @@ class TaxaRef:
 
     @classmethod
     def from_cdpnq(cls, name: str):
+        # The name and the valid name of synonyms are resolved together
+        return cls._from_cdpnq_resolved(cdpnq.resolve(name))
+
+    @classmethod
+    def _from_cdpnq_resolved(cls, refs: List[tuple]):
         out = []
 
-        refs = cdpnq.match_taxa(name)
         if refs is None:
             return []
-        for match_taxa in refs:
+        for match_taxa, valid_match in refs:
             if match_taxa["synonym"]:
-                valid_match = cdpnq.match_taxa(match_taxa["valid_name"])[0]
                 out.append(
                     cls(
                         source_id=CDPNQ_SOURCE_KEY,
@@ -549,12 +815,90 @@ def is_complex(name):
     return "|" in name
 
 
+def complex_members(name: str) -> List[str]:
+    """The names of the members of a complex name, or [name]"""
+    if not is_complex(name):
+        return [name]
+    return [v.strip() for v in name.split("|")]
+
+
+def _member_refs(members: List[str], refs: Dict[str, List[TaxaRef]],
+                 seen: set = None) -> List[TaxaRef]:
+    # Concatenate the refs of each member, copied for members already in
+    # `seen` so that no two results share a ref
+    out = []
+    if seen is None:
+        seen = set()
+    for member in members:
+        if member in seen:
+            out.extend(copy.copy(ref) for ref in refs[member])
+        else:
+            out.extend(refs[member])
+            seen.add(member)
+    return out
+
+
+def _broadcast(value, length: int) -> list:
+    # Repeat a scalar argument for each name of a batch
+    if value is None or isinstance(value, str):
+        return [value] * length
+    value = list(value)
+    if len(value) != length:
+        raise ValueError(
+            f"Expected {length} values, got {len(value)}.")
+    return value
+
+
 def find_authorship(name, name_simple):
     authorship = name.replace(name_simple, '')
     authorship = strip_authorship(authorship)
 
     return authorship
 
+def _gbif_record_from_match(match_species: dict):
+    """The fields of a GBIF species record used for taxa_ref rows, from a match
+
+    Returns None if the match response lacks them, e.g. when the authorship
+    cannot be split from the scientific name.
+    """
+    try:
+        canonical_name = match_species['canonicalName']
+        scientific_name = match_species['scientificName']
+        record = {'key': match_species['usageKey'], 'rank': match_species['rank']}
+    except KeyError:
+        return None
+    if scientific_name == canonical_name:
+        authorship = ''
+    elif scientific_name.startswith(canonical_name + ' '):
+        authorship = scientific_name[len(canonical_name) + 1:]
+    else:
+        return None
+    record.update(canonicalName=canonical_name, authorship=authorship)
+    for rank in GBIF_RANKS:
+        for field in (rank, f'{rank}Key'):
+            if field in match_species:
+                record[field] = match_species[field]
+    return record
+
+
+def _gbif_match_records(match_species: dict):
+    """Return the GBIF records of the matched name and of its accepted name
+
+    The accepted record is None unless the matched name is a synonym. The
+    record of an accepted name is built from the match response when
+    possible, the records of a synonym are fetched concurrently.
+    """
+    usage_key = match_species['usageKey']
+    accepted_key = match_species.get('acceptedUsageKey')
+    if accepted_key is None:
+        record = _gbif_record_from_match(match_species)
+        if record is None:
+            record = gbif.Species.get(usage_key)
+        return record, None
+    record, accepted = _pool.map_requests(gbif.Species.get, [usage_key, accepted_key])
+    return record, accepted
+
+
 def strip_authorship(authorship):
     authorship = authorship.strip()
     try:
@@ -3,7 +3,12 @@ from . import bryoquel
 from . import cdpnq
 from . import eliso
 from . import wikidata
-from typing import Optional
+from . import memo
+from . import _pool
+from .policy import RemoteSourceError
+from ._ranks import GBIF_RANKS, rank_order
+from typing import Dict, Optional
+import time
 
 # ACCEPTED_DATA_SOURCE = [
 #     'Integrated Taxonomic Information System (ITIS)',
@@ -11,17 +16,6 @@ from typing import Optional
 
 ACCEPTED_LANGUAGE = ['fra', 'eng']
 
-GBIF_RANKS = ['kingdom', 'phylum', 'class', 'order', 'family',
-                'genus', 'species', 'subspecies', 'variety']
-
-def rank_order(rank):
-    if not rank:
-        return 9999
-    try:
-        return GBIF_RANKS.index(rank.lower())
-    except ValueError:
-        return 9999
-
 def initcap_vernacular(name):
     capped_words = ['Amérique', 'America', 'Europe', 'Ungava', 'Alléghanys', 'Oregon', 'Virginie', 'Virginia', 'New York', 'Alaska', 'Pennsylvanie', 'Pennsylvania' , 'Canada', 'Inde', 'India', 'Islande', 'Égypte', 'Egypt', 'Pacifique', 'Pacific', 'Atlantique', 'Atlantic', 'Fraser', 'Est', 'Ouest', 'Nord', 'Alep', 'Anadyr', 'Eames', 'Allen', 'Anna', 'Uhler', 'Audubon']
     capped_words_lower = [word.lower() for word in capped_words]
@@ -56,7 +50,7 @@ class Vernacular:
     @classmethod
     def from_gbif(cls, gbif_key: int, rank: Optional[str] = None):
         out = []
-        gbif_search_results = gbif.Species.get_vernacular_name(gbif_key)
+        gbif_search_results = gbif.Species.iter_vernacular_names(gbif_key)
         for result in gbif_search_results:
             if result['language'] not in ACCEPTED_LANGUAGE:
                 continue
@@ -153,23 +147,42 @@ class Vernacular:
 
     @classmethod
     def from_wikidata_match(cls, name: str = '', rank: Optional[str] = None):
+        rank_qid = cls._wikidata_rank_qid(rank)
+        entities = cls._wikidata_entities(name)
+        return cls._from_wikidata_entities(name, entities, rank, rank_qid)
+
+    @staticmethod
+    def _wikidata_rank_qid(rank: Optional[str] = None):
+        if not rank:
+            return None
+        rank = rank.lower().strip()
+        try:
+            return wikidata.TAXA_RANKS_QID[rank]
+        except KeyError:
+            raise ValueError(f"Rank '{rank}' is not in the list of accepted ranks.")
+
+    @staticmethod
+    def _wikidata_entities(name: str) -> list:
+        # The two Wikidata requests, which do not depend on the rank
+        search_results = wikidata.search_entities(name)
+        if not search_results:
+            return []
+        ids = [result['id'] for result in search_results]
+        return wikidata.get_entities(ids, languages=['fr', 'en'])
+
+    @classmethod
+    def _from_wikidata_entities(cls, name: str, entities: list,
+                                rank: Optional[str] = None, rank_qid: str = None):
         LANGUAGE_DICT = {
             'fr': 'fra',
             'en': 'eng'
         }
         if rank:
             rank = rank.lower().strip()
-            try:
-                rank_qid = wikidata.TAXA_RANKS_QID[rank]
-            except KeyError:
-                raise ValueError(f"Rank '{rank}' is not in the list of accepted ranks.")
-                
+
         out = []
-        search_results = wikidata.search_entities(name)
-        if not search_results:
+        if not entities:
             return []
-        ids = [result['id'] for result in search_results]
-        entities = wikidata.get_entities(ids, languages=['fr', 'en'])
 
         # Filter entities with claims of taxon name (P225)
         # If rank is specified, filter entities with claims of rank (P105) matching the rank
@@ -220,6 +233,7 @@ class Vernacular:
         return out
 
     @classmethod
+    @memo.memoize()
     def from_match(cls, name: str, rank: Optional[str] = None, **match_kwargs):
         out = cls.from_gbif_match(name, **match_kwargs)
 
@@ -231,4 +245,50 @@ class Vernacular:
         out = [*out, *cls.from_cdpnq_match(name)]
         out = [*out, *cls.from_eliso_match(name)]
         out = [*out, *cls.from_wikidata_match(name, rank = rank)]
-        return out
\ No newline at end of file
+        return out
+
+    @classmethod
+    def from_match_concurrent(cls, name: str, rank: Optional[str] = None,
+                              timeouts: Dict[str, float] = None, **match_kwargs):
+        """Concurrent counterpart of `from_match`
+
+        GBIF and the two Wikidata requests start right away on the shared
+        thread pool, the Wikidata entities being filtered once the GBIF rank
+        is known. `timeouts` maps 'gbif' and 'wikidata' to deadlines in
+        seconds from the call (by default `_pool.TIMEOUT`). A source missing
+        its deadline or raising `RemoteSourceError` adds no names and a
+        warning is logged. Results are not memoized, since they may miss a
+        source.
+        """
+        timeouts = {**dict.fromkeys(('gbif', 'wikidata'), _pool.TIMEOUT),
+                    **(timeouts or {})}
+        start = time.monotonic()
+        rank_qid = cls._wikidata_rank_qid(rank)
+
+        gbif_future = _pool.submit(cls.from_gbif_match, name, **match_kwargs)
+        wikidata_future = _pool.submit(cls._wikidata_entities, name)
+
+        local_out = [
+            *cls.from_bryoquel_match(name),
+            *cls.from_cdpnq_match(name),
+            *cls.from_eliso_match(name),
+        ]
+
+        def remaining(source):
+            return max(0, start + timeouts[source] - time.monotonic())
+
+        gbif_out, = _pool.results(
+            [gbif_future], [f"GBIF vernacular '{name}'"], remaining('gbif'),
+            errors=RemoteSourceError)
+
+        # Get the first result rank to use as a fallback
+        if not rank and gbif_out:
+            rank = GBIF_RANKS[gbif_out[0].rank_order]
+            rank_qid = cls._wikidata_rank_qid(rank)
+
+        entities, = _pool.results(
+            [wikidata_future], [f"Wikidata '{name}'"], remaining('wikidata'),
+            errors=RemoteSourceError)
+        wikidata_out = cls._from_wikidata_entities(name, entities, rank, rank_qid)
+
+        return [*gbif_out, *local_out, *wikidata_out]
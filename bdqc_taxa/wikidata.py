@@ -1,5 +1,6 @@
-import urllib.request
-import json
+import urllib.parse
+from . import _transport
+from . import cache
 from typing import Union, List, Optional
 
 BASE_URL = "https://www.wikidata.org/w/api.php?"
@@ -29,8 +30,7 @@ def search_entities(query, language="en", rank:Optional[str] = None) -> dict:
     }
 
     url = BASE_URL + urllib.parse.urlencode(params)
-    response = urllib.request.urlopen(url).read()
-    data = json.loads(response)
+    data = cache.cached('wikidata', lambda: _transport.get_json(url), url)
 
     # Raise an exception if the request was not successful
     if "error" in data:
@@ -63,8 +63,7 @@ def get_entities(id: Union[str, List[str]], languages=["en, fr"]):
     }
     
     url = BASE_URL + urllib.parse.urlencode(params)
-    response = urllib.request.urlopen(url).read()
-    data = json.loads(response)
+    data = cache.cached('wikidata', lambda: _transport.get_json(url), url)
 
     # Raise an exception if the request was not successful
     if "error" in data:
@@ -0,0 +1,103 @@
+# Time TaxaRef.set_complex_match_type on large synthetic complex results
+#
+# Compares the match type setting with the previous implementation, which
+# removed duplicates by `str(ref.__dict__)` and grouped refs in nested dicts
+# by source, and checks both set the same match types. Runs offline.
+#
+#   python scripts/bench_complex.py [n_members ...]
+
+# %%
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bdqc_taxa.taxa_ref import TaxaRef
+
+SIZES = [4, 50, 500]
+N_SOURCES = 12
+RANKS = ["kingdom", "phylum", "class", "order", "family", "genus", "species"]
+
+
+def set_complex_match_type_legacy(taxa_ref_list):
+    out = []
+    taxa_ref_list = {str(ref.__dict__): ref for ref in taxa_ref_list}.values()
+    source_names = {ref.source_name for ref in taxa_ref_list}
+    source_refs = {source_name: {} for source_name in source_names}
+    source_rank_count = {source_name: {} for source_name in source_names}
+    for ref in taxa_ref_list:
+        try:
+            source_refs[ref.source_name][ref.scientific_name] = ref
+        except KeyError:
+            source_refs[ref.source_name] = {ref.scientific_name: ref}
+            source_rank_count[ref.source_name] = {}
+        try:
+            source_rank_count[ref.source_name][str(ref.rank_order)] += 1
+        except KeyError:
+            source_rank_count[ref.source_name][str(ref.rank_order)] = 1
+    for source in source_refs.keys():
+        source_set = sorted(source_refs[source].values(), key=lambda x: x.rank_order)
+        complex_switch = False
+        for i, ref in enumerate(source_set):
+            if not complex_switch:
+                complex_switch = ref.rank_order == source_set[i - 1].rank_order
+                if complex_switch:
+                    source_set[i - 2].match_type = "complex_closest_parent"
+                    source_set[i - 1].match_type = "complex"
+            if complex_switch:
+                ref.match_type = "complex"
+        out.extend(source_set)
+    return out
+
+
+def make_refs(n_members, seed=0):
+    """Classifications of `n_members` species of one family, from each source
+
+    Shared parents are repeated for every member, as when the refs of the
+    members of a complex name are concatenated.
+    """
+    rng = random.Random(seed)
+    refs = []
+    for member in range(n_members):
+        for source in range(N_SOURCES):
+            branch = []
+            for rank_order, rank in enumerate(RANKS):
+                name = (f"{rank} {source}" if rank != "species"
+                        else f"species {member} {rng.random():.6f}")
+                srid = f"{source}:{name}"
+                branch.append(srid)
+                refs.append(TaxaRef(
+                    scientific_name=name, source_id=source,
+                    source_name=f"source {source}", source_record_id=srid,
+                    rank=rank, rank_order=rank_order,
+                    classification_srids=list(branch), valid=True,
+                    valid_srid=srid, match_type="exact", is_parent=rank != "species"))
+    return refs
+
+
+def timed(func, refs):
+    refs = [copy.copy(ref) for ref in refs]
+    start = time.perf_counter()
+    out = func(refs)
+    return out, time.perf_counter() - start
+
+
+def by_source(refs):
+    return sorted(
+        (ref.source_name, ref.scientific_name, ref.match_type) for ref in refs)
+
+
+# %%
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or SIZES
+    print(f"{'members':>8}{'refs':>8}{'out':>8}{'legacy ms':>12}{'ms':>10}")
+    for n in sizes:
+        refs = make_refs(n)
+        expected, t_legacy = timed(set_complex_match_type_legacy, refs)
+        out, t = timed(TaxaRef.set_complex_match_type, refs)
+        assert by_source(out) == by_source(expected), "match types differ"
+        print(f"{n:>8}{len(refs):>8}{len(out):>8}"
+              f"{t_legacy * 1000:>12.1f}{t * 1000:>10.1f}")
@@ -0,0 +1,60 @@
+# Count the GBIF requests made per name by TaxaRef.from_gbif
+#
+# Compares the default mode, which fetches the record of each matched name,
+# with the match payload mode (`from_match=True`). Requires network access.
+#
+#   python scripts/bench_gbif_requests.py [name ...]
+
+# %%
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bdqc_taxa import gbif
+from bdqc_taxa.taxa_ref import TaxaRef
+
+NAMES = [
+    "Acer saccharum",
+    "Canis lupus",
+    "Cyanocitta cristata",
+    "Gomphus borealis", # synonym
+    "Lasiurus cinereus", # synonym
+    "Aulacomnium palustre",
+    "Libellula",
+    "Picea mariana",
+]
+
+
+def bench(names, from_match):
+    """Number of GBIF requests and elapsed time of each name"""
+    fetch = gbif._fetch_url_data
+    calls = []
+
+    def counted(url, params=None):
+        calls.append(url)
+        return fetch(url, params)
+
+    out = []
+    with patch.object(gbif, "_fetch_url_data", side_effect=counted):
+        for name in names:
+            calls.clear()
+            start = time.perf_counter()
+            TaxaRef.from_gbif(name, from_match=from_match)
+            out.append((name, len(calls), time.perf_counter() - start))
+    return out
+
+
+# %%
+if __name__ == "__main__":
+    names = sys.argv[1:] or NAMES
+    default = bench(names, from_match=False)
+    from_match = bench(names, from_match=True)
+    print(f"{'name':<24}{'requests':>10}{'from_match':>12}{'ms':>8}{'from_match':>12}")
+    for (name, n, t), (_, n_match, t_match) in zip(default, from_match):
+        print(f"{name:<24}{n:>10}{n_match:>12}{t * 1000:>8.0f}{t_match * 1000:>12.0f}")
+    total = sum(x[1] for x in default)
+    total_match = sum(x[1] for x in from_match)
+    print(f"{'total':<24}{total:>10}{total_match:>12}")
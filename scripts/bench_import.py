@@ -0,0 +1,61 @@
+# Measure the import time of each bdqc_taxa module
+#
+# Each module is imported in a fresh interpreter, as a PL/Python backend or a
+# short-lived CLI process would, and the median of several runs is reported
+# with whether the import opened the custom_sources database.
+#
+#   python scripts/bench_import.py [runs]
+
+# %%
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+MODULES = [
+    "bdqc_taxa",
+    "bdqc_taxa.custom_sources",
+    "bdqc_taxa.bryoquel",
+    "bdqc_taxa.cdpnq",
+    "bdqc_taxa.eliso",
+    "bdqc_taxa.gbif",
+    "bdqc_taxa.global_names",
+    "bdqc_taxa.wikidata",
+    "bdqc_taxa.taxa_ref",
+    "bdqc_taxa.vernacular",
+    "bdqc_taxa.autocomplete",
+    "bdqc_taxa.fuzzy",
+    "bdqc_taxa.aio",
+]
+
+CODE = """
+import time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from bdqc_taxa import custom_sources
+opened = hasattr(custom_sources._local, 'conn') or custom_sources.get_db_path.cache_info().currsize > 0
+print(elapsed, opened)
+"""
+
+
+def time_import(module, runs=5):
+    """Median import time of `module` in seconds, and whether it opened the database"""
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CODE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+    return statistics.median(times), out[1] == "True"
+
+
+# %%
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'module':<28}{'import (ms)':>12}  opens db")
+    for module in MODULES:
+        elapsed, opened = time_import(module, runs)
+        print(f"{module:<28}{elapsed * 1000:>12.1f}  {opened}")
@@ -0,0 +1,85 @@
+# Time TaxaRef._prune_parent_taxa on large synthetic result lists
+#
+# Compares the pruning with the previous implementation, which scanned the
+# parent srids list for every ref and every source special case, and checks
+# both keep the same refs. Runs offline.
+#
+#   python scripts/bench_prune.py [n_refs ...]
+
+# %%
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bdqc_taxa.taxa_ref import SOURCES_PARENT_CLASSIFICATION_SRIDS, TaxaRef
+
+SIZES = [1000, 10000, 50000]
+SOURCES = ["GBIF", "Catalogue of Life", "ITIS", "VASCAN", "CDPNQ", "Bryoquel"]
+PARENTS = ["Animalia", "Chordata", "Mammalia", "Plantae", "Tracheophyta"]
+
+
+def prune_legacy(taxa_ref_list, parent_taxa):
+    parent_srids = []
+    keep_ids = set()
+    for ref in taxa_ref_list:
+        if ref.scientific_name == parent_taxa:
+            parent_srids.append(ref.source_record_id)
+            keep_ids.update(ref.classification_srids[:-1])
+    for ref in taxa_ref_list:
+        if any([srid in ref.classification_srids for srid in parent_srids if ref.classification_srids]):
+            keep_ids.update(ref.classification_srids)
+    for ref in taxa_ref_list:
+        for source in SOURCES_PARENT_CLASSIFICATION_SRIDS:
+            if ref.source_name == source['source_name'] and \
+                    parent_taxa in source['scienfitic_name']:
+                keep_ids.update([ref.source_record_id])
+    return [ref for ref in taxa_ref_list if ref.valid_srid in keep_ids]
+
+
+def make_refs(n, seed=0):
+    """Branches of 7 ranks under random parents, from random sources"""
+    rng = random.Random(seed)
+    refs = []
+    while len(refs) < n:
+        source = rng.choice(SOURCES)
+        names = [f"taxon {rng.randrange(n)}" for _ in range(5)]
+        if source in ("CDPNQ", "Bryoquel"):
+            # No classification, matched names only
+            for name in names:
+                srid = f"{source}:{len(refs)}"
+                refs.append(TaxaRef(
+                    scientific_name=name, source_name=source,
+                    source_record_id=srid, valid_srid=srid))
+            continue
+        branch = []
+        for name in [rng.choice(["Animalia", "Plantae"]), rng.choice(PARENTS)] + names:
+            srid = f"{source}:{len(refs)}"
+            branch.append(srid)
+            refs.append(TaxaRef(
+                scientific_name=name, source_name=source,
+                source_record_id=srid, valid_srid=srid,
+                classification_srids=list(branch)))
+    return refs[:n]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - start
+
+
+# %%
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or SIZES
+    print(f"{'refs':>8}{'parent':>14}{'kept':>8}{'legacy ms':>12}{'ms':>10}")
+    for n in sizes:
+        refs = make_refs(n)
+        for parent in ("Chordata", "Mammalia", "Plantae"):
+            expected, t_legacy = timed(prune_legacy, refs, parent)
+            out, t = timed(TaxaRef._prune_parent_taxa, refs, parent)
+            assert out == expected, "pruned refs differ"
+            print(f"{n:>8}{parent:>14}{len(out):>8}"
+                  f"{t_legacy * 1000:>12.1f}{t * 1000:>10.1f}")
@@ -221,13 +221,10 @@ out_df.to_sql('bryoquel', conn, if_exists='replace')
 # Provide Autocomplete functionnality with FTS5
 # https://www.sqlite.org/fts5.html#full_text_index_queries
 
-# Create the FTS5 table
-conn.execute("DROP TABLE IF EXISTS bryoquel_fts")
-#conn.execute('CREATE VIRTUAL TABLE bryoquel_fts USING fts5(scientific_name, canonical_full, vernacular_fr, vernacular_en)')
-
-# Insert the data
-#conn.execute('INSERT INTO bryoquel_fts (scientific_name, canonical_full, vernacular_fr, vernacular_en) SELECT scientific_name, canonical_full, vernacular_fr, vernacular_en FROM bryoquel')
-conn.commit()
+# Create the lookup indexes and the FTS5 table
+from make_indexes import index_table, check_indexes
+index_table(conn, 'bryoquel')
+check_indexes(conn, ['bryoquel'])
 conn.close()
 
 # %%
@@ -110,11 +110,10 @@ conn.execute("DROP TABLE IF EXISTS cdpnq_odonates")
 # Write the table
 df.to_sql("cdpnq_odonates", conn, if_exists="replace", index=False)
 
-# Create fts5 virtual table for full text search
-conn.execute("DROP TABLE IF EXISTS cdpnq_odonates_fts")
-#c.execute("CREATE VIRTUAL TABLE cdpnq_odonates_fts USING fts5(name, canonical_full, vernacular_fr, vernacular_fr2)")
-#c.execute("INSERT INTO cdpnq_odonates_fts (name, canonical_full, vernacular_fr, vernacular_fr2) SELECT name, canonical_full, vernacular_fr, vernacular_fr2 FROM cdpnq_odonates")
-conn.commit()
+# Create the lookup indexes and the fts5 virtual table for full text search
+from make_indexes import index_table, check_indexes
+index_table(conn, "cdpnq_odonates")
+check_indexes(conn, ["cdpnq_odonates"])
 conn.close()
 
 # %%
@@ -162,11 +162,10 @@ conn.execute("DROP TABLE IF EXISTS cdpnq_vertebrates")
 # Write the table
 df.to_sql("cdpnq_vertebrates", conn, if_exists="replace", index=False)
 
-# Create fts5 virtual table for full text search
-conn.execute("DROP TABLE IF EXISTS cdpnq_vertebrates_fts")
-#conn.execute("CREATE VIRTUAL TABLE cdpnq_vertebrates_fts USING fts5(name, canonical_full, vernacular_fr, vernacular_en)")
-#conn.execute("INSERT INTO cdpnq_vertebrates_fts (name, canonical_full, vernacular_fr, vernacular_en) SELECT name, canonical_full, vernacular_fr, vernacular_en FROM cdpnq_vertebrates")
-conn.commit()
+# Create the lookup indexes and the fts5 virtual table for full text search
+from make_indexes import index_table, check_indexes
+index_table(conn, "cdpnq_vertebrates")
+check_indexes(conn, ["cdpnq_vertebrates"])
 conn.close()
 
 # # %%
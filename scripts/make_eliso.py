@@ -111,11 +111,10 @@ conn.execute("DROP TABLE IF EXISTS eliso_invertebrates")
 # Write the table
 inverts.to_sql("eliso_invertebrates", conn, if_exists="replace", index=False)
 
-# Create fts5 virtual table for full text search
-conn.execute("DROP TABLE IF EXISTS eliso_invertebrates_fts")
-#c.execute("CREATE VIRTUAL TABLE eliso_invertebrates_fts USING fts5(taxa_name, taxa_rank, vernacular_fr)")
-#c.execute("INSERT INTO eliso_invertebrates_fts (taxa_name, taxa_rank, vernacular_fr) SELECT taxa_name, taxa_rank, vernacular_fr FROM eliso_invertebrates")
-conn.commit()
+# Create the lookup indexes and the fts5 virtual table for full text search
+from make_indexes import index_table, check_indexes
+index_table(conn, "eliso_invertebrates")
+check_indexes(conn, ["eliso_invertebrates"])
 conn.close()
 
 
@@ -0,0 +1,108 @@
+# Create the lookup indexes and the FTS5 autocomplete tables of custom_sources.sqlite
+#
+# Called at the end of each `scripts/make_*.py` builder, after the table is
+# written, since `DataFrame.to_sql(if_exists="replace")` drops the table
+# indexes. Can also be run on its own to (re)index the whole database:
+#
+#   python scripts/make_indexes.py
+#
+# The build fails if a lookup column of the `bdqc_taxa` modules is not the
+# leading column of an index, or if a lookup query plan scans its table.
+
+# %%
+import sqlite3
+import sys
+
+DB_FILE = "bdqc_taxa/custom_sources.sqlite"
+
+# Lookup columns queried by the bdqc_taxa modules, by table
+# (column, columns of the B-tree index)
+LOOKUP_INDEXES = {
+    "bryoquel": [
+        ("scientific_name", ["scientific_name", "taxon_rank"]),
+    ],
+    "cdpnq_odonates": [
+        ("name", ["name", "rank"]),
+        ("valid_name", ["valid_name"]),
+    ],
+    "cdpnq_vertebrates": [
+        ("name", ["name", "rank"]),
+        ("valid_name", ["valid_name"]),
+    ],
+    "eliso_invertebrates": [
+        ("taxa_name", ["taxa_name", "taxa_rank"]),
+    ],
+}
+
+# Columns of the FTS5 trigram tables used for prefix and autocomplete search
+FTS_COLUMNS = {
+    "bryoquel": ["scientific_name", "vernacular_fr", "vernacular_en"],
+    "cdpnq_odonates": ["name", "vernacular_fr"],
+    "cdpnq_vertebrates": ["name", "vernacular_fr", "vernacular_en"],
+    "eliso_invertebrates": ["taxa_name", "vernacular_fr"],
+}
+
+
+def index_table(conn, table):
+    """Create the B-tree indexes and the FTS5 table of a custom source table"""
+    for column, index_columns in LOOKUP_INDEXES[table]:
+        index_name = f"ix_{table}_{column}"
+        conn.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+        conn.execute(
+            f'CREATE INDEX "{index_name}" ON "{table}" ('
+            + ", ".join(f'"{col}"' for col in index_columns) + ')')
+
+    # External content table: the text is read from the source table
+    fts_table = f"{table}_fts"
+    columns = ", ".join(f'"{col}"' for col in FTS_COLUMNS[table])
+    conn.execute(f'DROP TABLE IF EXISTS "{fts_table}"')
+    conn.execute(
+        f'CREATE VIRTUAL TABLE "{fts_table}" USING fts5({columns}, '
+        f"content='{table}', tokenize='trigram')")
+    conn.execute(f'INSERT INTO "{fts_table}" ("{fts_table}") VALUES (\'rebuild\')')
+    conn.commit()
+
+
+def check_indexes(conn, tables=None):
+    """Raise RuntimeError if any lookup column of `tables` is not indexed
+
+    All the tables are checked by default.
+    """
+    errors = []
+    for table in tables or LOOKUP_INDEXES:
+        lookups = LOOKUP_INDEXES[table]
+        leading_columns = set()
+        for index in conn.execute(f'PRAGMA index_list("{table}")'):
+            info = conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()
+            leading_columns.update(row[2] for row in info if row[0] == 0)
+
+        for column, _ in lookups:
+            if column not in leading_columns:
+                errors.append(f"{table}.{column} is not indexed")
+                continue
+            plan = conn.execute(
+                f'EXPLAIN QUERY PLAN SELECT * FROM "{table}" WHERE "{column}" = ?',
+                ("",)).fetchall()
+            if not any("USING" in row[-1] and "INDEX" in row[-1] for row in plan):
+                errors.append(f"{table}.{column} lookup does not use an index")
+
+        fts_table = f"{table}_fts"
+        if not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?",
+                (fts_table,)).fetchone():
+            errors.append(f"{fts_table} is missing")
+
+    if errors:
+        raise RuntimeError(
+            "Unindexed lookup columns in custom sources:\n" + "\n".join(errors))
+
+
+# %%
+if __name__ == "__main__":
+    db_file = sys.argv[1] if len(sys.argv) > 1 else DB_FILE
+    conn = sqlite3.connect(db_file)
+    for table in LOOKUP_INDEXES:
+        index_table(conn, table)
+    check_indexes(conn)
+    conn.execute("VACUUM")
+    conn.close()
@@ -32,5 +32,8 @@ setuptools.setup(
             'pandas',
             'numpy'
         ],
+        'arrow': [
+            'pyarrow'
+        ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import context
+from bdqc_taxa import aio
+from bdqc_taxa.taxa_ref import TaxaRef
+from bdqc_taxa.vernacular import Vernacular
+
+
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        TaxaRef.from_all_sources.cache_clear()
+        Vernacular.from_match.cache_clear()
+
+    def test_from_all_sources(self, name='Acer saccharum'):
+        refs = asyncio.run(aio.from_all_sources(name))
+        expected = TaxaRef.from_all_sources(name)
+        self.assertTrue(all(isinstance(ref, TaxaRef) for ref in refs))
+        self.assertEqual(
+            [ref.__dict__ for ref in refs],
+            [ref.__dict__ for ref in expected])
+
+    def test_vernacular_from_match(self, name='Canis lupus'):
+        out = asyncio.run(aio.vernacular_from_match(name))
+        expected = Vernacular.from_match(name)
+        self.assertTrue(all(isinstance(v, Vernacular) for v in out))
+        self.assertEqual([vars(v) for v in out], [vars(v) for v in expected])
+
+    @patch.object(TaxaRef, 'from_gbif', return_value=[])
+    @patch.object(TaxaRef, 'from_global_names', return_value=[])
+    def test_from_all_sources_local(self, mock_gn, mock_gbif, name='Libellula luctuosa'):
+        refs = asyncio.run(aio.from_all_sources(name, parent_taxa='Animalia'))
+        expected = TaxaRef.from_all_sources(name, parent_taxa='Animalia')
+        self.assertTrue(refs)
+        self.assertEqual(
+            [ref.__dict__ for ref in refs],
+            [ref.__dict__ for ref in expected])
+
+    @patch.object(TaxaRef, 'from_global_names', side_effect=lambda *args: [])
+    def test_from_all_sources_many_limits(self, mock_gn):
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def slow_gbif(name, authorship=None):
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return []
+
+        async def resolve(names):
+            limits = aio.HostLimits({aio.GBIF_HOST: 2})
+            return await aio.from_all_sources_many(names, limits=limits)
+
+        names = [f'Taxon {i}' for i in range(8)] + ['Taxon 0']
+        with patch.object(TaxaRef, 'from_gbif', side_effect=slow_gbif):
+            results = asyncio.run(resolve(names))
+        self.assertEqual(len(results), 9)
+        self.assertEqual(mock_gn.call_count, 8)
+        self.assertEqual(state['max'], 2)
+
+    @patch.object(TaxaRef, 'from_global_names', side_effect=lambda *args: [])
+    @patch.object(TaxaRef, 'from_gbif', side_effect=lambda *args: [])
+    def test_from_all_sources_many_parent_taxa(self, mock_gbif, mock_gn,
+                                               names=['Anthelia julacea', 'Anthelia julacea']):
+        results = asyncio.run(aio.from_all_sources_many(
+            names, parent_taxa=['Plantae', 'Animalia']))
+        self.assertEqual([len(refs) for refs in results], [3, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
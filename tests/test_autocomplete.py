@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import context
+from bdqc_taxa.autocomplete import autocomplete
+
+
+class TestAutocomplete(unittest.TestCase):
+    def test_scientific_prefix(self, prefix='Libellula luc'):
+        results = autocomplete(prefix)
+        self.assertEqual(results[0]['name'], 'Libellula luctuosa')
+        self.assertEqual(results[0]['source'], 'CDPNQ')
+        self.assertEqual(results[0]['valid_name'], 'Libellula luctuosa')
+        self.assertEqual(results[0]['match_quality'], 'prefix')
+
+    def test_vernacular_prefix(self, prefix='aulacomnie des'):
+        results = autocomplete(prefix, sources=['Bryoquel'])
+        self.assertEqual(results[0]['name'], 'aulacomnie des marais')
+        self.assertEqual(results[0]['language'], 'fra')
+        self.assertEqual(results[0]['valid_name'], 'Aulacomnium palustre')
+
+    def test_synonym_valid_name(self, prefix='Gomphus borealis'):
+        results = autocomplete(prefix, sources=['CDPNQ'])
+        self.assertEqual(results[0]['match_quality'], 'exact')
+        self.assertEqual(results[0]['valid_name'], 'Phanogomphus borealis')
+
+    def test_ranking(self, prefix='aulacomni'):
+        results = autocomplete(prefix, limit=20)
+        self.assertTrue(len(results) > 1)
+        keys = [(r['match_quality'] != 'prefix', r['rank_order']) for r in results]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_word_prefix(self, prefix='moss'):
+        results = autocomplete(prefix, limit=3)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r['match_quality'] == 'word_prefix' for r in results))
+        self.assertTrue(all(r['language'] == 'eng' for r in results))
+
+    def test_infix(self, prefix='ulacomn'):
+        results = autocomplete(prefix)
+        self.assertTrue(results)
+        self.assertTrue(all(r['match_quality'] == 'infix' for r in results))
+
+    def test_limit_and_sources(self, prefix='a'):
+        results = autocomplete(prefix, limit=5, sources=['Eliso'])
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r['source'] == 'Eliso' for r in results))
+
+    def test_no_match(self, prefix='Vincent Beauregard'):
+        self.assertEqual(autocomplete(prefix), [])
+        self.assertEqual(autocomplete(' '), [])
+
+    def test_bad_source(self):
+        with self.assertRaises(ValueError):
+            autocomplete('Acer', sources=['GBIF'])
+
+    def test_offline_imports(self):
+        # The remote sources are not imported with autocomplete
+        code = (
+            "import sys\n"
+            "import bdqc_taxa.autocomplete\n"
+            "assert 'bdqc_taxa.vernacular' not in sys.modules\n"
+            "assert 'bdqc_taxa._transport' not in sys.modules\n")
+        subprocess.run(
+            [sys.executable, '-c', code], check=True,
+            cwd=os.path.join(os.path.dirname(__file__), '..'))
+
+
+if __name__ == '__main__':
+    unittest.main()
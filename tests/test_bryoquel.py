@@ -1,7 +1,9 @@
 # Test the bryoquel module
 
+import os
 import unittest
 
+from bdqc_taxa import bryoquel
 from bdqc_taxa.bryoquel import match_taxa
 
 class TestBryoquel(unittest.TestCase):
@@ -36,4 +38,12 @@ class TestBryoquel(unittest.TestCase):
 
     def test_no_match_taxon(self, name = 'Insecta'):
         result = match_taxa(name)
-        self.assertEqual(result, None)
\ No newline at end of file
+        self.assertEqual(result, None)
+
+    def test_module_attributes(self):
+        self.assertTrue(os.path.isfile(bryoquel.db_path))
+        row = bryoquel.conn.execute(
+            "SELECT count(*) FROM bryoquel").fetchone()
+        self.assertGreater(row[0], 0)
+        with self.assertRaises(AttributeError):
+            bryoquel.missing
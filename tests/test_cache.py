@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import context
+from stub_server import StubServer
+from bdqc_taxa import _transport, cache, gbif, global_names, wikidata
+from bdqc_taxa.policy import RemoteSourceError
+
+
+def route(method, path, body):
+    if path.startswith('/v1/species/'):
+        return 200, {'key': int(path.split('/')[-1].split('?')[0])}
+    if path.startswith('/api/v1/verifications'):
+        return 200, {'names': [{'name': 'Acer', 'results': []}]}
+    if path.startswith('/w/api.php'):
+        return 200, {'entities': {'Q1': {'id': 'Q1'}}}
+    return 404, {}
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'responses.sqlite')
+
+    def test_request_key(self):
+        self.assertEqual(
+            cache.request_key('http://a', {'b': 1, 'a': 2}),
+            cache.request_key('http://a', {'a': 2, 'b': 1}))
+        self.assertNotEqual(
+            cache.request_key('http://a', body={'names': ['A']}),
+            cache.request_key('http://a', body={'names': ['B']}))
+
+    def test_get_set(self):
+        response_cache = cache.ResponseCache(self.path)
+        self.assertIsNone(response_cache.get('gbif', 'k'))
+        response_cache.set('gbif', 'k', {'key': 1})
+        self.assertEqual(response_cache.get('gbif', 'k'), {'key': 1})
+        self.assertEqual(response_cache.info()['hits'], {'gbif': 1})
+        self.assertEqual(response_cache.info()['misses'], {'gbif': 1})
+        response_cache.close()
+
+        # Persisted on disk
+        response_cache = cache.ResponseCache(self.path)
+        self.assertEqual(len(response_cache), 1)
+        self.assertEqual(response_cache.get('gbif', 'k'), {'key': 1})
+        response_cache.close()
+
+    def test_ttl(self):
+        response_cache = cache.ResponseCache(self.path, ttl={'gbif': 0.01})
+        response_cache.set('gbif', 'k', {'key': 1})
+        response_cache.set('wikidata', 'w', {'key': 2})
+        time.sleep(0.02)
+        self.assertIsNone(response_cache.get('gbif', 'k'))
+        self.assertEqual(response_cache.get('wikidata', 'w'), {'key': 2})
+        self.assertEqual(len(response_cache), 1)
+        response_cache.close()
+
+    def test_lru_eviction(self):
+        response_cache = cache.ResponseCache(self.path, max_entries=2)
+        response_cache.set('gbif', 'a', [1])
+        time.sleep(0.001)
+        response_cache.set('gbif', 'b', [2])
+        time.sleep(0.001)
+        response_cache.get('gbif', 'a')
+        time.sleep(0.001)
+        response_cache.set('gbif', 'c', [3])
+        self.assertEqual(len(response_cache), 2)
+        self.assertIsNone(response_cache.get('gbif', 'b'))
+        self.assertEqual(response_cache.get('gbif', 'a'), [1])
+        response_cache.close()
+
+    def test_sources_cached(self):
+        cache.enable(self.path)
+        self.addCleanup(cache.disable)
+        self.addCleanup(_transport.close)
+        with StubServer(route) as server, \
+                patch.object(gbif, 'HOST', server.url), \
+                patch.object(global_names, 'HOST', server.url), \
+                patch.object(wikidata, 'BASE_URL', f"{server.url}/w/api.php?"):
+            for _ in range(2):
+                self.assertEqual(gbif.Species.get(3), {'key': 3})
+                self.assertEqual(global_names._verify('Acer')['names'][0]['name'], 'Acer')
+                self.assertEqual(global_names.verify_many(['Acer'])[0][0]['name'], 'Acer')
+                self.assertEqual(wikidata.get_entities(['Q1']), [{'id': 'Q1'}])
+            self.assertEqual(len(server.requests), 4)
+        info = cache.get_cache().info()
+        self.assertEqual(info['hits'], {'gbif': 1, 'global_names': 2, 'wikidata': 1})
+        self.assertEqual(info['misses'], {'gbif': 1, 'global_names': 2, 'wikidata': 1})
+
+    def test_errors_not_cached(self):
+        cache.enable(self.path)
+        self.addCleanup(cache.disable)
+        with StubServer(route) as server, patch.object(gbif, 'HOST', server.url):
+            for _ in range(2):
+                with self.assertRaises(RemoteSourceError):
+                    gbif._get_url_data(f"{server.url}/missing")
+            self.assertEqual(len(server.requests), 2)
+        self.assertEqual(len(cache.get_cache()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
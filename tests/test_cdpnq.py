@@ -2,7 +2,7 @@
 
 import unittest
 
-from bdqc_taxa import cdpnq
+from bdqc_taxa import cdpnq, custom_sources, memory_index
 
 class TestCdpnqOdonates(unittest.TestCase):
     def test_match_species(self, name = 'Libellula luctuosa'):
@@ -77,3 +77,39 @@ class TestCdpnq(unittest.TestCase):
         result = cdpnq.match_taxa(name)
         self.assertEqual(result[0]['name'], name)
         self.assertEqual(result[0]['rank'], 'species')
+
+
+class TestResolve(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(memory_index.disable)
+
+    def expected(self, name):
+        matches = cdpnq.match_taxa(name)
+        if matches is None:
+            return None
+        return [
+            (match, cdpnq.match_taxa(match['valid_name'])[0] if match['synonym'] else None)
+            for match in matches]
+
+    def test_resolve_synonym(self, name='Gomphus borealis'):
+        ((match, valid_match),) = cdpnq.resolve(name)
+        self.assertEqual(match['name'], name)
+        self.assertEqual(valid_match['name'], 'Phanogomphus borealis')
+        self.assertEqual(cdpnq.resolve(name), self.expected(name))
+
+    def test_resolve_valid(self, name='Pica hudsonia'):
+        self.assertEqual(cdpnq.resolve(name), [(cdpnq.match_taxa(name)[0], None)])
+
+    def test_no_match(self, name='Vincent Beauregard'):
+        self.assertIsNone(cdpnq.resolve(name))
+
+    def test_resolve_many(self):
+        c = custom_sources.execute(
+            'SELECT name FROM cdpnq_odonates UNION ALL SELECT name FROM cdpnq_vertebrates')
+        names = [name for (name,) in c.fetchall() if isinstance(name, str)]
+        c.close()
+        names += ['Libellula, julia', ' Pica pica', 'Vincent Beauregard']
+        expected = {name: self.expected(name) for name in names}
+        self.assertEqual(cdpnq.resolve_many(names), expected)
+        memory_index.enable()
+        self.assertEqual(cdpnq.resolve_many(names), expected)
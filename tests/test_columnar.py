@@ -0,0 +1,81 @@
+# Test the columnar export of TaxaRef results
+
+import unittest
+
+import context
+from bdqc_taxa import columnar
+from bdqc_taxa.taxa_ref import TaxaRef
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def make_refs(name, n):
+    return [
+        TaxaRef(name, source_id=11, source_record_id=i, rank='species',
+                rank_order=6, classification_srids=[1, i], valid=True,
+                valid_srid=i, match_type='exact', is_parent=False)
+        for i in range(n)]
+
+
+class TestColumns(unittest.TestCase):
+    def test_refs(self):
+        refs = make_refs('Acer saccharum', 3)
+        out = columnar.to_columns(refs)
+        self.assertEqual(list(out), list(columnar.COLUMNS))
+        self.assertEqual(out['source_record_id'], [0, 1, 2])
+        self.assertEqual(
+            [dict(zip(out, row)) for row in zip(*out.values())],
+            [vars(ref) for ref in refs])
+
+    def test_named_results(self):
+        results = {
+            'Acer saccharum': make_refs('Acer saccharum', 2),
+            'Picea': [],
+            'Lasiurus cinereus': make_refs('Lasiurus cinereus', 1),
+        }
+        out = columnar.to_columns(results)
+        self.assertEqual(
+            out['input_name'],
+            ['Acer saccharum', 'Acer saccharum', 'Lasiurus cinereus'])
+        self.assertEqual(out['scientific_name'], out['input_name'])
+
+    def test_chunks(self):
+        results = ((f'name {i}', make_refs(f'name {i}', 3)) for i in range(5))
+        chunks = list(columnar.iter_columns(results, chunk_size=4))
+        self.assertEqual([len(c['source_id']) for c in chunks], [4, 4, 4, 3])
+
+    def test_empty(self):
+        self.assertEqual(list(columnar.iter_columns([])), [])
+        self.assertEqual(
+            columnar.to_columns({}), {c: [] for c in columnar.COLUMNS})
+
+    def test_unnamed_batch_results(self):
+        # Batch results are lists of refs, not paired with their names
+        for results in ([make_refs('A a', 2), []], [[], make_refs('A a', 1)]):
+            with self.assertRaises(TypeError):
+                columnar.to_columns(results)
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(columnar.iter_columns([], chunk_size=0))
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestArrow(unittest.TestCase):
+    def test_table(self):
+        results = {'Acer saccharum': make_refs('Acer saccharum', 3)}
+        table = columnar.to_arrow(results, chunk_size=2)
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.schema, columnar.arrow_schema(named=True))
+        self.assertEqual(table.column('source_record_id').to_pylist(), ['0', '1', '2'])
+        self.assertEqual(table.column('classification_srids').to_pylist()[1], ['1', '1'])
+
+    def test_empty(self):
+        self.assertEqual(columnar.to_arrow([]).num_rows, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
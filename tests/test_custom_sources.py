@@ -0,0 +1,147 @@
+# Test the custom_sources sqlite database shipped with the package
+
+import importlib.util
+import os
+import sqlite3
+import subprocess
+import sys
+import unittest
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import context
+from bdqc_taxa import bryoquel, cdpnq, custom_sources, memory_index
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts')
+
+spec = importlib.util.spec_from_file_location(
+    'make_indexes', os.path.join(SCRIPTS_DIR, 'make_indexes.py'))
+make_indexes = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(make_indexes)
+
+
+class TestCustomSources(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(custom_sources.db_path)
+        self.addCleanup(self.conn.close)
+
+    def test_lookup_columns_indexed(self):
+        make_indexes.check_indexes(self.conn)
+
+    def test_check_fails_unindexed(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE bryoquel (scientific_name TEXT, taxon_rank TEXT)')
+        with self.assertRaises(RuntimeError):
+            make_indexes.check_indexes(conn)
+        conn.close()
+
+    def test_check_table(self):
+        # Only the given table needs to be indexed
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE bryoquel (scientific_name TEXT, taxon_rank TEXT, '
+                     'vernacular_fr TEXT, vernacular_en TEXT)')
+        make_indexes.index_table(conn, 'bryoquel')
+        make_indexes.check_indexes(conn, ['bryoquel'])
+        with self.assertRaises(RuntimeError):
+            make_indexes.check_indexes(conn, ['bryoquel', 'cdpnq_odonates'])
+        conn.close()
+
+    def test_fts_trigram(self, query='aulacomnie'):
+        rows = self.conn.execute(
+            'SELECT scientific_name FROM bryoquel_fts WHERE bryoquel_fts MATCH ?',
+            (f'"{query}"',)).fetchall()
+        self.assertIn(('Aulacomnium palustre',), rows)
+
+
+class TestConnection(unittest.TestCase):
+    def test_read_only(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            custom_sources.execute('DELETE FROM bryoquel')
+
+    def test_connection_per_thread(self):
+        def lookup(name):
+            return id(custom_sources.get_connection()), cdpnq.match_taxa(name)
+
+        main_conn = custom_sources.get_connection()
+        names = ['Libellula julia', 'Cyanocitta cristata'] * 8
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lookup, names))
+
+        for (_, result), name in zip(results, names):
+            self.assertEqual(result, cdpnq.match_taxa(name))
+        self.assertNotIn(
+            id(main_conn),
+            {conn_id for conn_id, _ in results})
+
+    def test_lazy_open(self):
+        code = (
+            "import bdqc_taxa.taxa_ref, bdqc_taxa.vernacular\n"
+            "from bdqc_taxa import custom_sources\n"
+            "assert not hasattr(custom_sources._local, 'conn')\n"
+            "assert custom_sources.get_db_path.cache_info().currsize == 0\n")
+        subprocess.run(
+            [sys.executable, '-c', code], check=True,
+            cwd=os.path.join(os.path.dirname(__file__), '..'))
+
+    def test_db_path(self):
+        self.assertTrue(os.path.isfile(custom_sources.db_path))
+
+    def test_db_path_without_files(self):
+        # Python < 3.9 has no importlib.resources.files
+        import importlib.resources
+        files = importlib.resources.files
+        custom_sources.get_db_path.cache_clear()
+        del importlib.resources.files
+        try:
+            with warnings.catch_warnings():
+                # importlib.resources.path is deprecated from Python 3.11
+                warnings.simplefilter('ignore', DeprecationWarning)
+                path = custom_sources.get_db_path()
+        finally:
+            importlib.resources.files = files
+            custom_sources.get_db_path.cache_clear()
+        self.assertEqual(path, custom_sources.db_path)
+
+    def test_close(self):
+        conn = custom_sources.get_connection()
+        custom_sources.close()
+        self.assertIsNot(custom_sources.get_connection(), conn)
+
+
+class TestMatchMany(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(memory_index.disable)
+
+    def assertSameMany(self, match_taxa, match_taxa_many, table, column, extra):
+        c = custom_sources.execute(f'SELECT DISTINCT "{column}" FROM "{table}"')
+        names = [name for (name,) in c.fetchall() if isinstance(name, str)]
+        c.close()
+        names += extra
+        expected = {name: match_taxa(name) for name in names}
+
+        self.assertEqual(match_taxa_many(names), expected)
+        with patch.object(custom_sources, 'IN_SIZE', 5):
+            self.assertEqual(match_taxa_many(names[:23]),
+                             {name: expected[name] for name in names[:23]})
+        memory_index.enable()
+        self.assertEqual(match_taxa_many(names), expected)
+
+    def test_bryoquel(self):
+        self.assertSameMany(
+            bryoquel.match_taxa, bryoquel.match_taxa_many, 'bryoquel',
+            'scientific_name', [' Sphagnum ', 'Sphagnum', 'Vincent Beauregard'])
+
+    def test_cdpnq(self):
+        self.assertSameMany(
+            cdpnq.match_taxa, cdpnq.match_taxa_many, 'cdpnq_vertebrates',
+            'name', ['Libellula, julia', 'Libellula luctuosa', 'Gomphus borealis', 'Vincent Beauregard'])
+
+    def test_empty(self):
+        self.assertEqual(bryoquel.match_taxa_many([]), {})
+        self.assertEqual(
+            custom_sources.first_rows('bryoquel', 'scientific_name', 'taxon_rank', []), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
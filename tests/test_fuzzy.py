@@ -0,0 +1,51 @@
+import unittest
+
+import context
+from bdqc_taxa import fuzzy
+
+
+class TestLevenshtein(unittest.TestCase):
+    def test_distance(self):
+        self.assertEqual(fuzzy.levenshtein('kitten', 'sitting'), 3)
+        self.assertEqual(fuzzy.levenshtein('', 'abc'), 3)
+        self.assertEqual(fuzzy.levenshtein('abc', 'abc'), 0)
+
+    def test_max_distance(self):
+        self.assertEqual(fuzzy.levenshtein('kitten', 'sitting', 1), 2)
+        self.assertEqual(fuzzy.levenshtein('a', 'abcdef', 2), 3)
+
+
+class TestFuzzyMatch(unittest.TestCase):
+    def test_misspelling(self, name='Anthelia julaca'):
+        results = fuzzy.match(name)
+        self.assertEqual(results[0]['name'], 'Anthelia julacea')
+        self.assertEqual(results[0]['source'], 'Bryoquel')
+        self.assertEqual(results[0]['distance'], 1)
+        self.assertEqual(results[0]['match_type'], 'fuzzy')
+
+    def test_exact(self, name='Pica hudsonia'):
+        results = fuzzy.match(name)
+        self.assertEqual(results[0]['name'], name)
+        self.assertEqual(results[0]['distance'], 0)
+        self.assertEqual(results[0]['match_type'], 'exact')
+
+    def test_case_and_spaces(self, name=' canis  LUPUS'):
+        results = fuzzy.match(name)
+        self.assertEqual(results[0]['name'], 'Canis lupus')
+        self.assertEqual(results[0]['distance'], 0)
+
+    def test_sources(self, name='Canisse lupus'):
+        self.assertEqual(fuzzy.match(name, sources=['CDPNQ'])[0]['name'], 'Canis lupus')
+        self.assertFalse(fuzzy.match(name, sources=['Bryoquel']))
+        with self.assertRaises(ValueError):
+            fuzzy.match(name, sources=['GBIF'])
+
+    def test_max_distance(self, name='Canisse lupus'):
+        self.assertFalse(fuzzy.match(name, max_distance=1))
+
+    def test_no_match(self, name='Vincent Beauregard'):
+        self.assertEqual(fuzzy.match(name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
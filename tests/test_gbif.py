@@ -1,5 +1,8 @@
 import context
+import threading
 from unittest import TestCase
+from unittest.mock import patch
+from bdqc_taxa import gbif
 from bdqc_taxa.gbif import Species
 from typing import List
 
@@ -41,3 +44,56 @@ class TestSpecies(TestCase):
         for result in results:
             self.assertTrue(all([v for k, v in result.items()
                                  if k not in ['preferred']]))
+
+
+class TestPagination(TestCase):
+    def setUp(self, n=250):
+        self.records = [{'vernacularName': str(i)} for i in range(n)]
+        self.calls = []
+        self.threads = set()
+
+    def fake_get(self, with_count=True):
+        def get(url, params=None, limit=None, offset=0):
+            self.calls.append((limit, offset, dict(params)))
+            self.threads.add(threading.get_ident())
+            page = {
+                'offset': offset, 'limit': limit,
+                'endOfRecords': offset + limit >= len(self.records),
+                'results': self.records[offset:offset + limit]}
+            if with_count:
+                page['count'] = len(self.records)
+            return page
+        return get
+
+    def test_concurrent_pages(self):
+        with patch.object(gbif, '_get_url_data', side_effect=self.fake_get()):
+            results = Species.get_vernacular_name(1, limit=100)
+        self.assertEqual(results, self.records)
+        self.assertEqual(sorted(c[:2] for c in self.calls), [(100, 0), (100, 100), (100, 200)])
+        self.assertGreater(len(self.threads), 1)
+
+    def test_serial_without_count(self):
+        with patch.object(gbif, '_get_url_data', side_effect=self.fake_get(with_count=False)):
+            results = Species.get_vernacular_name(1, limit=100)
+        self.assertEqual(results, self.records)
+        self.assertEqual([c[:2] for c in self.calls], [(100, 0), (100, 100), (100, 200)])
+
+    def test_limit(self):
+        with patch.object(gbif, '_get_url_data', side_effect=self.fake_get()):
+            results = Species.get_vernacular_name(1, limit=5000)
+        self.assertEqual(results, self.records)
+        self.assertEqual([c[:2] for c in self.calls], [(gbif.MAX_LIMIT, 0)])
+
+    def test_params_not_shared(self):
+        params = {'q': 'x'}
+        with patch.object(gbif, '_get_url_data', side_effect=self.fake_get()):
+            list(gbif._iter_pages('url', params, limit=50))
+        self.assertEqual(params, {'q': 'x'})
+
+    def test_generator(self):
+        with patch.object(gbif, '_get_url_data', side_effect=self.fake_get()):
+            pages = Species.iter_vernacular_names(1, limit=100)
+            self.assertEqual(next(pages), self.records[0])
+            self.assertEqual(len(self.calls), 1)
+            pages.close()
+
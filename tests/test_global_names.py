@@ -1,5 +1,7 @@
 from bdqc_taxa import global_names
+from bdqc_taxa.policy import RemoteSourceError
 from unittest import TestCase
+from unittest.mock import patch
 import context
 
 class TestGlobalNames(TestCase):
@@ -39,4 +41,42 @@ class TestGlobalNames(TestCase):
         results = global_names.verify(name, authorship)
         self.assertTrue(len(results) > 0)
         self.assertTrue(results['names'][0]['matchType'] == 'NoMatch')
-        
+
+    def test_verify_many(self, names = ['Acer saccharum', 'Vincent Beauregard', 'Diptera']):
+        results = global_names.verify_many(names)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(results[0][0]['matchType'] == 'Exact')
+        self.assertTrue(results[1][0]['matchType'] == 'NoMatch')
+        self.assertEqual(
+            results[2][0]['results'],
+            global_names.verify('Diptera')['names'][0]['results'])
+
+    def test_verify_many_chunks(self, names = ['Acer saccharum', 'Acer rubrum', 'Acer nigrum']):
+        def fake_verify_many(name_strings, data_sources, all_matches):
+            return {'names': [{'name': name, 'results': []} for name in name_strings]}
+
+        with patch.object(global_names, '_verify_many', side_effect=fake_verify_many) as mock:
+            results = global_names.verify_many(
+                names, authorships=[None, 'L.', None], chunk_size=2)
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(
+            [[result['name'] for result in members] for members in results],
+            [['Acer saccharum'], ['Acer rubrum L.'], ['Acer nigrum']])
+
+    def test_verify_many_complex(self, names = ['Acer rubrum|Acer nigrum', 'Acer saccharum']):
+        def fake_verify_many(name_strings, data_sources, all_matches):
+            return {'names': [{'name': name, 'results': []} for name in name_strings]}
+
+        with patch.object(global_names, '_verify_many', side_effect=fake_verify_many) as mock:
+            results = global_names.verify_many(names, authorships=['L.', None])
+        self.assertEqual(
+            mock.call_args[0][0], ['Acer rubrum', 'Acer nigrum L.', 'Acer saccharum'])
+        self.assertEqual(
+            [[result['name'] for result in members] for members in results],
+            [['Acer rubrum', 'Acer nigrum L.'], ['Acer saccharum']])
+
+    def test_verify_many_missing_names(self, names = ['Acer saccharum', 'Acer rubrum']):
+        response = {'names': [{'name': 'Acer saccharum', 'results': []}]}
+        with patch.object(global_names, '_request', return_value=response):
+            with self.assertRaises(RemoteSourceError):
+                global_names.verify_many(names)
@@ -0,0 +1,90 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import context
+from bdqc_taxa import memo
+from bdqc_taxa.taxa_ref import TaxaRef
+from bdqc_taxa.vernacular import Vernacular
+
+
+class TestMemoize(unittest.TestCase):
+    def test_memoize(self):
+        calls = []
+
+        @memo.memoize(maxsize=2)
+        def resolve(name, rank=None):
+            calls.append(name)
+            return [{'name': name}]
+
+        self.assertEqual(resolve('A'), [{'name': 'A'}])
+        self.assertEqual(resolve('A', None), [{'name': 'A'}])
+        self.assertEqual(calls, ['A'])
+        self.assertEqual(resolve.cache_info().hits, 1)
+
+        # Defensive copies
+        resolve('A')[0]['name'] = 'B'
+        self.assertEqual(resolve('A'), [{'name': 'A'}])
+
+        # LRU eviction
+        resolve('B')
+        resolve('C')
+        self.assertEqual(resolve.cache_info().currsize, 2)
+        resolve('A')
+        self.assertEqual(calls, ['A', 'B', 'C', 'A'])
+
+        resolve.cache_clear()
+        self.assertEqual(resolve.cache_info(), memo.CacheInfo(0, 0, 2, 0, memo.TTL))
+
+    def test_ttl(self):
+        calls = []
+
+        @memo.memoize(ttl=0.01)
+        def resolve(name):
+            calls.append(name)
+            return [name]
+
+        resolve('A')
+        time.sleep(0.02)
+        resolve('A')
+        self.assertEqual(calls, ['A', 'A'])
+
+    def test_disabled(self):
+        calls = []
+
+        @memo.memoize()
+        def resolve(name):
+            calls.append(name)
+            return [name]
+
+        resolve.cache_configure(maxsize=0)
+        resolve('A')
+        resolve('A')
+        self.assertEqual(calls, ['A', 'A'])
+
+
+class TestMemoizedSources(unittest.TestCase):
+    def setUp(self):
+        TaxaRef.from_all_sources.cache_clear()
+        self.addCleanup(TaxaRef.from_all_sources.cache_clear)
+
+    @patch.object(TaxaRef, 'from_gbif', return_value=[])
+    @patch.object(TaxaRef, 'from_global_names', side_effect=lambda *args: [])
+    def test_from_all_sources(self, mock_gn, mock_gbif, name='Libellula luctuosa'):
+        refs = TaxaRef.from_all_sources(name)
+        refs[0].match_type = 'complex'
+        refs_cached = TaxaRef.from_all_sources(name)
+        self.assertEqual(mock_gn.call_count, 1)
+        self.assertEqual(refs_cached[0].match_type, 'exact')
+        self.assertIsNot(refs[0], refs_cached[0])
+        self.assertEqual(TaxaRef.from_all_sources.cache_info().hits, 1)
+
+        TaxaRef.from_all_sources(name, parent_taxa='Animalia')
+        self.assertEqual(mock_gn.call_count, 2)
+
+    def test_vernacular_from_match_surface(self):
+        self.assertIsInstance(Vernacular.from_match.cache_info(), memo.CacheInfo)
+
+
+if __name__ == '__main__':
+    unittest.main()
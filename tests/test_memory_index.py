@@ -0,0 +1,64 @@
+# Test the in-memory indexes of the custom sources
+
+import unittest
+
+import context
+from bdqc_taxa import bryoquel, cdpnq, eliso, custom_sources, memory_index
+
+
+def table_names(table, column):
+    c = custom_sources.execute(f'SELECT DISTINCT "{column}" FROM "{table}"')
+    names = [name for (name,) in c.fetchall() if isinstance(name, str)]
+    c.close()
+    return names
+
+
+class TestMemoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(memory_index.disable)
+
+    def assertSameResults(self, match_taxa, names):
+        memory_index.disable()
+        expected = [match_taxa(name) for name in names]
+        memory_index.enable()
+        self.assertEqual([match_taxa(name) for name in names], expected)
+
+    def test_bryoquel(self):
+        names = table_names('bryoquel', 'scientific_name')
+        self.assertSameResults(
+            bryoquel.match_taxa, names + [' Sphagnum ', 'Vincent Beauregard'])
+
+    def test_cdpnq(self):
+        names = (table_names('cdpnq_odonates', 'name')
+                 + table_names('cdpnq_vertebrates', 'name'))
+        self.assertSameResults(
+            cdpnq.match_taxa, names + ['Libellula, julia', 'Vincent Beauregard'])
+
+    def test_eliso(self):
+        names = table_names('eliso_invertebrates', 'taxa_name')
+        self.assertSameResults(
+            eliso.match_taxa, names + ['Vincent Beauregard'])
+
+    def test_lazy_load(self):
+        memory_index.enable()
+        self.assertEqual(memory_index.footprint()['total']['rows'], 0)
+        bryoquel.match_taxa('Sphagnum')
+        self.assertEqual(
+            set(memory_index.footprint()) - {'total'}, {'bryoquel'})
+
+    def test_footprint(self):
+        memory_index.enable(preload=True)
+        report = memory_index.footprint()
+        self.assertEqual(set(report), {*memory_index.LOOKUPS, 'total'})
+        self.assertGreater(report['bryoquel']['rows'], 0)
+        self.assertGreater(report['total']['bytes'], report['bryoquel']['bytes'])
+
+    def test_disable(self):
+        memory_index.enable(preload=True)
+        memory_index.disable()
+        self.assertFalse(memory_index.is_enabled())
+        self.assertEqual(memory_index.footprint()['total']['rows'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
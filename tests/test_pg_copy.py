@@ -0,0 +1,88 @@
+# Test the PostgreSQL COPY writer
+
+import csv
+import io
+import unittest
+
+import context
+from bdqc_taxa import pg_copy
+from bdqc_taxa.taxa_ref import TaxaRef
+
+
+def make_ref(**kwargs):
+    fields = dict(
+        scientific_name='Acer saccharum', source_id=11,
+        source_record_id='2432582', source_name='GBIF Backbone Taxonomy',
+        authorship='Marshall', rank='species', rank_order=6,
+        classification_srids=['6', '7707728'], valid=True,
+        valid_srid='2432582', match_type='exact', is_parent=False)
+    return TaxaRef(**{**fields, **kwargs})
+
+
+class TestArrayLiteral(unittest.TestCase):
+    def test_plain(self):
+        self.assertEqual(pg_copy.array_literal([6, '7707728']), '{6,7707728}')
+
+    def test_quoted(self):
+        self.assertEqual(
+            pg_copy.array_literal(['a b', 'x,y', 'q"t', 'b\\s', '', 'null', None]),
+            '{"a b","x,y","q\\"t","b\\\\s","","null",NULL}')
+
+    def test_empty(self):
+        self.assertEqual(pg_copy.array_literal([]), '{}')
+
+
+class TestCopyText(unittest.TestCase):
+    def test_row(self):
+        buffer = io.StringIO()
+        count = pg_copy.write_copy([make_ref()], buffer)
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            buffer.getvalue(),
+            '\\N\t11\t2432582\tGBIF Backbone Taxonomy\tAcer saccharum\t'
+            'Marshall\tspecies\t6\t{6,7707728}\tt\t2432582\texact\tf\n')
+
+    def test_escapes(self):
+        ref = make_ref(authorship='A\tB\nC\\D', classification_srids=['a b'])
+        line, = pg_copy.iter_copy([ref])
+        fields = line.rstrip('\n').split('\t')
+        self.assertEqual(fields[5], 'A\\tB\\nC\\\\D')
+        self.assertEqual(fields[8], '{"a b"}')
+
+    def test_named(self):
+        lines = list(pg_copy.iter_copy({'Acer saccharum': [make_ref(), make_ref()]}))
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith('\tAcer saccharum\n'))
+
+
+class TestCopyCsv(unittest.TestCase):
+    def test_roundtrip(self):
+        refs = [make_ref(), make_ref(authorship='L., 1753', classification_srids=None, id=3),
+                make_ref(authorship='')]
+        buffer = io.StringIO()
+        pg_copy.write_copy(refs, buffer, format='csv', chunk_size=2)
+        rows = list(csv.reader(io.StringIO(buffer.getvalue())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0][8], '{6,7707728}')
+        self.assertEqual(rows[1][0], '3')
+        self.assertEqual(rows[1][5], 'L., 1753')
+        self.assertEqual(rows[1][8], '')
+        # Empty strings are quoted, NULLs are not
+        line = buffer.getvalue().splitlines()[2]
+        self.assertTrue(line.startswith(',11,'))
+        self.assertIn(',"",', line)
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            list(pg_copy.iter_copy([make_ref()], format='binary'))
+
+
+class TestCopyStatement(unittest.TestCase):
+    def test_statement(self):
+        statement = pg_copy.copy_statement('taxa_ref', format='csv', named=True)
+        self.assertTrue(statement.startswith('COPY taxa_ref ("id", "source_id"'))
+        self.assertTrue(statement.endswith('"input_name") FROM STDIN WITH (FORMAT csv)'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import context
+from stub_server import StubServer
+from bdqc_taxa import _transport, policy
+from bdqc_taxa.policy import (
+    CircuitBreaker, CircuitOpenError, RemoteSourceError, TokenBucket)
+from bdqc_taxa.taxa_ref import TaxaRef
+from bdqc_taxa.vernacular import Vernacular
+
+HOST = '127.0.0.1'
+
+
+class Flaky:
+    """Route failing with `status` for the first `failures` requests"""
+    def __init__(self, failures, status=503):
+        self.failures = failures
+        self.status = status
+
+    def __call__(self, method, path, body):
+        if self.failures:
+            self.failures -= 1
+            return self.status, {'error': 'unavailable'}
+        return 200, {'ok': True}
+
+
+class FakeClock:
+    """Clock advanced by the calls to `sleep` only"""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=4, burst=1, clock=clock, sleep=clock.sleep)
+        for _ in range(6):
+            bucket.acquire()
+        # One token at start, then one every 1/4 s
+        self.assertEqual(clock.now, 1.25)
+
+    def test_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, burst=5, clock=clock, sleep=clock.sleep)
+        for _ in range(5):
+            bucket.acquire()
+        self.assertEqual(clock.now, 0)
+        bucket.acquire()
+        self.assertEqual(clock.now, 1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_half_open_close(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        # Single trial request while half open
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_failure(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class TestHostPolicy(unittest.TestCase):
+    def setUp(self):
+        policy.configure(HOST, backoff_base=0.01, max_retries=2,
+                         failure_threshold=2, reset_timeout=60)
+        self.addCleanup(policy.reset)
+        self.addCleanup(policy.HOST_POLICIES.pop, HOST, None)
+        self.addCleanup(_transport.close)
+
+    def test_retry(self):
+        with StubServer(Flaky(2)) as server:
+            out = _transport.get_json(f"{server.url}/x")
+            self.assertEqual(out, {'ok': True})
+            self.assertEqual(len(server.requests), 3)
+        self.assertEqual(policy.stats()[HOST]['retries'], 2)
+
+    def test_retries_exhausted(self):
+        with StubServer(Flaky(5, 429)) as server:
+            with self.assertRaises(RemoteSourceError) as cm:
+                _transport.get_json(f"{server.url}/x")
+            self.assertEqual(len(server.requests), 3)
+        self.assertEqual(cm.exception.status, 429)
+        self.assertEqual(cm.exception.attempts, 3)
+        self.assertTrue(cm.exception.retryable)
+
+    def test_not_retried(self):
+        with StubServer(Flaky(5, 404)) as server:
+            with self.assertRaises(RemoteSourceError):
+                _transport.get_json(f"{server.url}/x")
+            self.assertEqual(len(server.requests), 1)
+        self.assertEqual(policy.stats()[HOST]['circuit'], 'closed')
+
+    def test_circuit_open(self):
+        with StubServer(Flaky(100, 500)) as server:
+            for _ in range(2):
+                with self.assertRaises(RemoteSourceError):
+                    _transport.get_json(f"{server.url}/x")
+            sent = len(server.requests)
+            with self.assertRaises(CircuitOpenError):
+                _transport.get_json(f"{server.url}/x")
+            self.assertEqual(len(server.requests), sent)
+        self.assertEqual(policy.stats()[HOST]['rejected'], 1)
+
+    def test_other_error_half_open(self):
+        host_policy = policy.HostPolicy(HOST, failure_threshold=1, reset_timeout=0)
+        host_policy.breaker.record_failure()
+
+        def send():
+            raise ValueError('bad body')
+
+        with self.assertRaises(ValueError):
+            host_policy.call(send)
+        self.assertEqual(host_policy.breaker.state, CircuitBreaker.OPEN)
+        # The next trial request is let through
+        self.assertEqual(host_policy.call(lambda: 'ok'), 'ok')
+        self.assertEqual(host_policy.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_invalid_body(self):
+        with StubServer(Flaky(0)) as server, \
+                patch.object(_transport, '_decode', side_effect=EOFError('truncated')):
+            with self.assertRaises(RemoteSourceError) as cm:
+                _transport.get_json(f"{server.url}/x")
+            self.assertEqual(len(server.requests), 3)
+        self.assertTrue(cm.exception.retryable)
+
+    def test_retry_after(self):
+        host_policy = policy.get_policy(HOST)
+        self.assertEqual(host_policy.backoff(1, retry_after=2), 2)
+        self.assertLessEqual(host_policy.backoff(3), 0.04)
+        self.assertEqual(_transport._retry_after('3'), 3)
+        self.assertIsNone(_transport._retry_after('Wed, 21 Oct 2015 07:28:00 GMT'))
+
+    def test_unknown_parameter(self):
+        with self.assertRaises(ValueError):
+            policy.configure(HOST, retries=3)
+
+
+class TestDegrade(unittest.TestCase):
+    def setUp(self):
+        TaxaRef.from_all_sources.cache_clear()
+        self.addCleanup(TaxaRef.from_all_sources.cache_clear)
+        self.error = RemoteSourceError('unavailable', host='api.gbif.org', status=503)
+
+    def test_from_all_sources(self, name='Libellula luctuosa'):
+        with patch.object(TaxaRef, 'from_global_names', return_value=[]), \
+             patch.object(TaxaRef, 'from_gbif', side_effect=self.error), \
+             self.assertLogs('bdqc_taxa._pool', level='WARNING'):
+            refs = TaxaRef.from_all_sources(name)
+        self.assertTrue(refs)
+        self.assertTrue(all(ref.source_name == 'CDPNQ' for ref in refs))
+        # Partial results are not memoized
+        self.assertEqual(TaxaRef.from_all_sources.cache_info().currsize, 0)
+
+    def test_from_all_sources_batch(self, name='Libellula luctuosa'):
+        with patch.object(TaxaRef, 'from_global_names_batch', side_effect=self.error), \
+             patch.object(TaxaRef, 'from_gbif', return_value=[]), \
+             self.assertLogs('bdqc_taxa.taxa_ref', level='WARNING'):
+            results = TaxaRef.from_all_sources_batch([name])
+        self.assertTrue(results[0])
+
+    def test_vernacular(self, name='Libellula luctuosa'):
+        with patch.object(Vernacular, 'from_gbif_match', side_effect=self.error), \
+             patch.object(Vernacular, '_wikidata_entities', side_effect=self.error), \
+             self.assertLogs('bdqc_taxa._pool', level='WARNING'):
+            out = Vernacular.from_match_concurrent(name)
+        self.assertEqual({v.source for v in out}, {'CDPNQ'})
+
+
+if __name__ == '__main__':
+    unittest.main()
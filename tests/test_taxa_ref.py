@@ -1,8 +1,14 @@
+import json
+import threading
+import time
 import unittest
+from unittest.mock import patch
+from urllib.parse import unquote_plus
 
 import context
+from stub_server import StubServer
 from bdqc_taxa import bryoquel, taxa_ref
-from bdqc_taxa import global_names
+from bdqc_taxa import global_names, _pool
 
 
 class TestFindAuthorship(unittest.TestCase):
@@ -43,6 +49,43 @@ class TestTaxaRef(unittest.TestCase):
         tr = taxa_ref.TaxaRef(name)
         self.assertTrue(isinstance(tr.__dict__, dict))
 
+    def test_slots(self):
+        tr = taxa_ref.TaxaRef('Lasiurus cinereus', rank='Species')
+        with self.assertRaises(AttributeError):
+            tr.not_a_field = 1
+        self.assertEqual(tr.rank, 'species')
+        self.assertEqual(list(vars(tr)), list(taxa_ref.TaxaRef.FIELDS))
+
+    def test_to_dict_to_tuple(self):
+        tr = taxa_ref.TaxaRef(
+            'Lasiurus cinereus', source_id=11, source_record_id='2432582',
+            classification_srids=['1', '44'], match_type='exact')
+        self.assertEqual(tr.to_dict(), vars(tr))
+        self.assertEqual(tr.to_tuple(), tuple(tr.to_dict().values()))
+
+    def test_eq_hash(self):
+        tr = taxa_ref.TaxaRef(
+            'Lasiurus cinereus', source_id=11, source_record_id='2432582',
+            valid_srid='2432582', match_type='exact')
+        same = taxa_ref.TaxaRef(
+            'Lasiurus cinereus', source_id=11, source_record_id='2432582',
+            valid_srid='2432582', match_type='fuzzy')
+        other = taxa_ref.TaxaRef(
+            'Lasiurus cinereus', source_id=1, source_record_id='2432582',
+            valid_srid='2432582')
+        self.assertEqual(tr, same)
+        self.assertNotEqual(tr, other)
+        self.assertEqual(len({tr, same, other}), 2)
+
+    def test_copy_pickle(self):
+        import copy
+        import pickle
+        tr = taxa_ref.TaxaRef(
+            'Lasiurus cinereus', source_id=11, classification_srids=['1', '44'])
+        for copied in [copy.deepcopy(tr), pickle.loads(pickle.dumps(tr))]:
+            self.assertEqual(vars(copied), vars(tr))
+            self.assertIsNot(copied.classification_srids, tr.classification_srids)
+
     def test_repr(self):
         name = 'Lasiurus cinereus'
         tr = taxa_ref.TaxaRef(name)
@@ -78,6 +121,14 @@ class TestTaxaRef(unittest.TestCase):
         refs = taxa_ref.TaxaRef.from_global_names(name)
         self.assertFalse(refs)
 
+    def test_from_global_names_batch(self, names=['Acer saccharum', 'Vincent Beauregard']):
+        refs = taxa_ref.TaxaRef.from_global_names_batch(names)
+        self.assertEqual(len(refs), 2)
+        self.assertEqual(
+            [ref.__dict__ for ref in refs[0]],
+            [ref.__dict__ for ref in taxa_ref.TaxaRef.from_global_names(names[0])])
+        self.assertFalse(refs[1])
+
     def test_from_gbif(self, name='Acer saccharum'):
         refs = taxa_ref.TaxaRef.from_gbif(name)
         self.assertTrue(len(refs) > 1)
@@ -279,6 +330,23 @@ class TestTaxaRef(unittest.TestCase):
         self.assertTrue(any(bryoquel_matches))
         self.assertTrue(any([ref.scientific_name == 'Anthelia julacea' for ref in bryoquel_matches]))
 
+    def test_from_custom_sources_fuzzy(self, name='Anthelia julaca'):
+        refs = taxa_ref.TaxaRef.from_custom_sources_fuzzy(name)
+        self.assertTrue(all([ref.source_id == 1001 for ref in refs]))
+        match_refs = [ref for ref in refs if not ref.is_parent]
+        self.assertEqual(match_refs[0].scientific_name, 'Anthelia julacea')
+        self.assertEqual(match_refs[0].match_type, 'fuzzy')
+        self.assertTrue(any([ref.rank == 'genus' for ref in refs]))
+
+    def test_from_custom_sources_fuzzy_cdpnq_synonym(self, name='Gomphus exils'):
+        refs = taxa_ref.TaxaRef.from_custom_sources_fuzzy(name)
+        self.assertTrue(all([ref.source_name == 'CDPNQ' for ref in refs]))
+        self.assertTrue(any([ref.scientific_name == 'Gomphus exilis' and ref.match_type == 'fuzzy' for ref in refs]))
+
+    def test_from_custom_sources_fuzzy_no_match(self, name='Vincent Beauregard'):
+        refs = taxa_ref.TaxaRef.from_custom_sources_fuzzy(name)
+        self.assertFalse(refs)
+
     def test_bubo_parent_parentless_output_len(self, name='Bubo scandiacus', parent_scientific_name='Chordata'):
         results_parent = taxa_ref.TaxaRef.from_all_sources(name)
         results_parentless = taxa_ref.TaxaRef.from_all_sources(name, parent_taxa=parent_scientific_name)
@@ -350,6 +418,28 @@ class TestTaxaRef(unittest.TestCase):
                     res.source_name == 'CDPNQ' for res in results)
         )
 
+class TestCustomSourcesMany(unittest.TestCase):
+    def test_from_custom_sources_fuzzy_matched_many(self):
+        fuzzy_names = [('Libellula luctuosa', 'fuzzy'), ('Gomphus borealis', 'partialexact'),
+                       ('Anthelia julacea', 'fuzzy'), ('Pica pica', 'fuzzy'),
+                       ('Libellula luctuosa', 'partialfuzzy'), ('Vincent Beauregard', 'fuzzy')]
+        expected = [
+            ref.__dict__ for name, match_type in fuzzy_names
+            for ref in taxa_ref.TaxaRef.from_custom_sources_fuzzy_matched(name, match_type)]
+        refs = taxa_ref.TaxaRef.from_custom_sources_fuzzy_matched_many(fuzzy_names)
+        self.assertEqual([ref.__dict__ for ref in refs], expected)
+
+    def test_from_custom_sources_many(self, names=['Rangifer tarandus', 'Sphagnum', 'Rana']):
+        refs = taxa_ref.TaxaRef.from_custom_sources_many(names)
+        self.assertEqual(list(refs), names)
+        for name in names:
+            expected = [*taxa_ref.TaxaRef.from_bryoquel(name),
+                        *taxa_ref.TaxaRef.from_cdpnq(name)]
+            self.assertEqual(
+                [ref.__dict__ for ref in refs[name]],
+                [ref.__dict__ for ref in expected])
+
+
 class TestComplex(unittest.TestCase):
     def test_complex_is_true(self,
                              name='Lasiurus cinereus|Lasionycteris noctivagans'):
@@ -424,6 +514,37 @@ class TestComplex(unittest.TestCase):
         refs = taxa_ref.TaxaRef.from_all_sources(name)
         self.assertTrue(len(refs) >= 1)
 
+    def _ref(self, source_name, name, rank_order, srid):
+        return taxa_ref.TaxaRef(
+            source_name=source_name, scientific_name=name,
+            rank_order=rank_order, source_record_id=srid, valid_srid=srid,
+            classification_srids=['1', srid], match_type='exact')
+
+    def test_set_complex_match_type(self):
+        refs = [
+            self._ref('GBIF', 'Lasiurus cinereus', 6, '3'),
+            self._ref('GBIF', 'Animalia', 0, '1'),
+            self._ref('GBIF', 'Vespertilionidae', 4, '2'),
+            self._ref('CDPNQ', 'Lasiurus cinereus', 6, 'a'),
+            self._ref('CDPNQ', 'Lasionycteris noctivagans', 6, 'b'),
+            self._ref('GBIF', 'Animalia', 0, '1'),
+            self._ref('GBIF', 'Animalia', 0, '1'),
+            self._ref('GBIF', 'Lasionycteris noctivagans', 6, '4'),
+            self._ref('GBIF', 'Vespertilionidae', 4, '2'),
+        ]
+        out = taxa_ref.TaxaRef.set_complex_match_type(refs)
+        self.assertEqual(
+            [(ref.source_name, ref.scientific_name, ref.match_type) for ref in out],
+            [('GBIF', 'Animalia', 'exact'),
+             ('GBIF', 'Vespertilionidae', 'complex_closest_parent'),
+             ('GBIF', 'Lasiurus cinereus', 'complex'),
+             ('GBIF', 'Lasionycteris noctivagans', 'complex'),
+             # The first ref compares with the last one
+             ('CDPNQ', 'Lasiurus cinereus', 'complex'),
+             ('CDPNQ', 'Lasionycteris noctivagans', 'complex')])
+        # The last of duplicate refs is kept
+        self.assertIs(out[0], refs[6])
+
 class TestParent(unittest.TestCase):
     # Test case for Salix matching for a genus of Animalia and a genus of Plantae
     def test_from_all_sources_parent_taxa_salix(self, name='Salix', parent_taxa = 'Plantae'):
@@ -497,5 +618,310 @@ class TestParent(unittest.TestCase):
         self.assertTrue(any([ref.source_name == 'CDPNQ' for ref in refs]))
 
 
+    def _ref(self, name, srid, classification_srids, source_name='GBIF', valid_srid=None):
+        return taxa_ref.TaxaRef(
+            scientific_name=name, source_record_id=srid, source_name=source_name,
+            classification_srids=classification_srids,
+            valid_srid=srid if valid_srid is None else valid_srid)
+
+    def test_prune_parent_taxa(self):
+        refs = [
+            self._ref('Animalia', '1', ['1']),
+            self._ref('Chordata', '2', ['1', '2']),
+            self._ref('Salix', '3', ['1', '2', '3']),
+            self._ref('Plantae', '10', ['10']),
+            self._ref('Salix', '11', ['10', '11']),
+            self._ref('Salix', '12', None),
+            # Synonym, kept with its valid record
+            self._ref('Salixa', '13', ['1', '2', '13'], valid_srid='3'),
+        ]
+        pruned = taxa_ref.TaxaRef._prune_parent_taxa(refs, 'Chordata')
+        self.assertEqual(
+            [ref.source_record_id for ref in pruned], ['1', '2', '3', '13'])
+
+    def test_prune_parent_taxa_source_without_branch(self):
+        refs = [
+            self._ref('Aeshna', '1', None, source_name='CDPNQ'),
+            self._ref('Aeshna', '2', None, source_name='Bryoquel'),
+        ]
+        pruned = taxa_ref.TaxaRef._prune_parent_taxa(refs, 'Odonata')
+        self.assertEqual([ref.source_record_id for ref in pruned], ['1'])
+        pruned = taxa_ref.TaxaRef._prune_parent_taxa(refs, 'Bryophyta')
+        self.assertEqual([ref.source_record_id for ref in pruned], ['2'])
+        self.assertFalse(taxa_ref.TaxaRef._prune_parent_taxa(refs, 'Fungi'))
+
+
+class TestBatch(unittest.TestCase):
+    def test_from_all_sources_batch(self, names=['Acer saccharum', 'Libellula julia', 'Acer saccharum']):
+        results = taxa_ref.TaxaRef.from_all_sources_batch(names)
+        self.assertEqual(len(results), 3)
+        for name, refs in zip(names, results):
+            expected = taxa_ref.TaxaRef.from_all_sources(name)
+            self.assertEqual(
+                [ref.__dict__ for ref in refs],
+                [ref.__dict__ for ref in expected])
+
+    @patch.object(taxa_ref.TaxaRef, 'from_gbif', return_value=[])
+    @patch.object(taxa_ref.TaxaRef, 'from_global_names_batch',
+                  side_effect=lambda names, authorships: [[] for _ in names])
+    def test_from_all_sources_batch_dedupe(self, mock_gn, mock_gbif,
+                                           names=['Anthelia julacea', 'Libellula julia', 'Anthelia julacea']):
+        results = taxa_ref.TaxaRef.from_all_sources_batch(names, parent_taxa='Plantae')
+        mock_gn.assert_called_once_with(
+            ['Anthelia julacea', 'Libellula julia'], [None, None])
+        self.assertEqual([len(refs) for refs in results], [3, 0, 3])
+
+    @patch.object(taxa_ref.TaxaRef, 'from_gbif', return_value=[])
+    @patch.object(taxa_ref.TaxaRef, 'from_global_names_batch',
+                  side_effect=lambda names, authorships: [[] for _ in names])
+    def test_from_all_sources_batch_parent_taxa(self, mock_gn, mock_gbif,
+                                                names=['Anthelia julacea', 'Anthelia julacea']):
+        results = taxa_ref.TaxaRef.from_all_sources_batch(
+            names, parent_taxa=['Plantae', 'Animalia'])
+        self.assertEqual([len(refs) for refs in results], [3, 0])
+
+    def test_from_all_sources_batch_bad_length(self, names=['Acer saccharum', 'Acer rubrum']):
+        with self.assertRaises(ValueError):
+            taxa_ref.TaxaRef.from_all_sources_batch(names, authorships=['L.'])
+
+    def test_from_global_names_batch_complex(self, names=['Acer rubrum|Acer nigrum', 'Acer saccharum']):
+        with StubServer(_verifier_route) as server, \
+                patch.object(global_names, 'HOST', server.url):
+            results = taxa_ref.TaxaRef.from_global_names_batch(names, ['L.', None])
+            for name, authorship, refs in zip(names, ['L.', None], results):
+                expected = taxa_ref.TaxaRef.from_global_names(name, authorship)
+                self.assertEqual(
+                    [ref.__dict__ for ref in refs],
+                    [ref.__dict__ for ref in expected])
+        self.assertEqual(
+            [ref.scientific_name for ref in results[0] if not ref.is_parent],
+            ['Acer rubrum', 'Acer nigrum'])
+
+
+def _verification(name_string):
+    # Verifier stand-in, names are matched exactly with their authorship
+    canonical, _, authorship = name_string.partition(' L.')
+    return {'name': name_string, 'matchType': 'Exact', 'results': [{
+        'dataSourceId': 1, 'dataSourceTitleShort': 'COL',
+        'recordId': canonical, 'currentRecordId': canonical,
+        'matchedName': name_string, 'matchedCanonicalFull': canonical,
+        'matchType': 'Exact', 'isSynonym': False,
+        'classificationPath': f'Plantae|{canonical}',
+        'classificationRanks': 'kingdom|species',
+        'classificationIds': f'P|{canonical}'}]}
+
+
+def _verifier_route(method, path, body):
+    if method == 'POST':
+        name_strings = json.loads(body)['nameStrings']
+    else:
+        # The verifier splits the name strings of the url on "|"
+        name_strings = unquote_plus(path.split('/')[-1].split('?')[0]).split('|')
+    return 200, {'names': [_verification(name) for name in name_strings]}
+
+
+def _slow(refs, delay):
+    def lookup(*args, **kwargs):
+        time.sleep(delay)
+        return list(refs)
+    return lookup
+
+
+def _meeting(refs, barrier):
+    # Fails with BrokenBarrierError unless all the parties run at once
+    def lookup(*args, **kwargs):
+        barrier.wait()
+        return list(refs)
+    return lookup
+
+
+class TestFanOut(unittest.TestCase):
+    def setUp(self):
+        taxa_ref.TaxaRef.from_all_sources.cache_clear()
+        self.addCleanup(taxa_ref.TaxaRef.from_all_sources.cache_clear)
+        self.gn_ref = taxa_ref.TaxaRef(
+            'Acer saccharum', source_id=1, source_record_id='gn',
+            match_type='exact', is_parent=False)
+        self.gbif_ref = taxa_ref.TaxaRef(
+            'Acer saccharum', source_id=11, source_record_id='gbif',
+            match_type='exact', is_parent=False)
+
+    def test_order_and_concurrency(self):
+        barrier = threading.Barrier(2, timeout=5)
+        with patch.object(taxa_ref.TaxaRef, 'from_global_names',
+                          side_effect=_meeting([self.gn_ref], barrier)), \
+             patch.object(taxa_ref.TaxaRef, 'from_gbif',
+                          side_effect=_meeting([self.gbif_ref], barrier)):
+            refs = taxa_ref.TaxaRef.from_all_sources('Acer saccharum')
+        self.assertEqual([ref.source_record_id for ref in refs], ['gn', 'gbif'])
+
+    def test_source_timeout(self):
+        with patch.object(taxa_ref.TaxaRef, 'from_global_names',
+                          side_effect=_slow([self.gn_ref], 0)), \
+             patch.object(taxa_ref.TaxaRef, 'from_gbif',
+                          side_effect=_slow([self.gbif_ref], 1)), \
+             patch.object(_pool, 'TIMEOUT', 0.2), \
+             self.assertLogs('bdqc_taxa._pool', level='WARNING'):
+            refs = taxa_ref.TaxaRef.from_all_sources('Acer saccharum')
+        self.assertEqual([ref.source_record_id for ref in refs], ['gn'])
+
+    def test_source_error(self):
+        with patch.object(taxa_ref.TaxaRef, 'from_global_names',
+                          side_effect=RuntimeError('boom')), \
+             patch.object(taxa_ref.TaxaRef, 'from_gbif', return_value=[]):
+            with self.assertRaises(RuntimeError):
+                taxa_ref.TaxaRef.from_all_sources('Acer saccharum')
+
+
+class TestComplexMembers(unittest.TestCase):
+    def setUp(self):
+        taxa_ref.TaxaRef.from_all_sources.cache_clear()
+        self.addCleanup(taxa_ref.TaxaRef.from_all_sources.cache_clear)
+        self.members = []
+        # Set by the tests checking that the members are matched concurrently
+        self.barrier = None
+        self.delay = 0
+
+        def gbif(name, authorship=None, from_match=False):
+            self.members.append(name)
+            if self.barrier:
+                self.barrier.wait()
+            time.sleep(self.delay)
+            return [taxa_ref.TaxaRef(
+                name, source_id=11, source_name='GBIF', source_record_id=name,
+                valid_srid=name, rank='species', rank_order=6,
+                match_type='exact', is_parent=False)]
+
+        for patcher in [
+                patch.object(taxa_ref.TaxaRef, '_from_gbif_singleton', side_effect=gbif),
+                patch.object(taxa_ref.TaxaRef, 'from_global_names', side_effect=_slow([], 0))]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_complex_members(self):
+        self.assertEqual(taxa_ref.complex_members('A b'), ['A b'])
+        self.assertEqual(taxa_ref.complex_members('A b | C d|E'), ['A b', 'C d', 'E'])
+
+    def test_from_gbif(self, name='A a|B b|C c|D d|A a'):
+        # Repeated members are matched once, members concurrently
+        self.barrier = threading.Barrier(4, timeout=5)
+        refs = taxa_ref.TaxaRef.from_gbif(name)
+        self.assertEqual(
+            [ref.scientific_name for ref in refs], ['A a', 'B b', 'C c', 'D d', 'A a'])
+        self.assertEqual(sorted(self.members), ['A a', 'B b', 'C c', 'D d'])
+        self.assertIsNot(refs[0], refs[-1])
+
+    def test_from_all_sources(self, name='Libellula luctuosa|Anthelia julacea|A a'):
+        self.barrier = threading.Barrier(3, timeout=5)
+        refs = taxa_ref.TaxaRef.from_all_sources(name)
+        # The custom sources are queried for each member
+        self.assertIn(('CDPNQ', 'Libellula luctuosa'),
+                      {(ref.source_name, ref.scientific_name) for ref in refs})
+        self.assertIn(('Bryoquel', 'Anthelia julacea'),
+                      {(ref.source_name, ref.scientific_name) for ref in refs})
+        self.assertTrue(any(ref.match_type == 'complex' for ref in refs))
+
+    @patch.object(taxa_ref.TaxaRef, 'from_global_names_batch',
+                  side_effect=lambda names, authorships: [[] for _ in names])
+    def test_from_all_sources_batch(self, mock_gn, names=['A a|B b', 'B b|C c', 'C c']):
+        results = taxa_ref.TaxaRef.from_all_sources_batch(names)
+        self.assertEqual(sorted(self.members), ['A a', 'B b', 'C c'])
+        for name, refs in zip(names, results):
+            expected = taxa_ref.TaxaRef.from_all_sources(name)
+            self.assertEqual(
+                [ref.__dict__ for ref in refs],
+                [ref.__dict__ for ref in expected])
+
+    @patch.object(taxa_ref.TaxaRef, 'from_global_names_batch',
+                  side_effect=lambda names, authorships: [[] for _ in names])
+    def test_from_all_sources_batch_queued(self, mock_gn):
+        # More lookups than pool workers, each within the timeout, none dropped
+        names = [f'A a{i}' for i in range(_pool.MAX_WORKERS * 5)]
+        self.delay = 0.1
+        with patch.object(_pool, 'TIMEOUT', 0.3):
+            results = taxa_ref.TaxaRef.from_all_sources_batch(names)
+        self.assertEqual(len(self.members), len(names))
+        self.assertEqual(
+            [[ref.source_record_id for ref in refs if ref.source_name == 'GBIF']
+             for refs in results],
+            [[name] for name in names])
+
+
+ACER_MATCH = {
+    'usageKey': 3189863, 'scientificName': 'Acer saccharum Marshall',
+    'canonicalName': 'Acer saccharum', 'rank': 'SPECIES', 'status': 'ACCEPTED',
+    'confidence': 99, 'matchType': 'EXACT', 'kingdom': 'Plantae',
+    'phylum': 'Tracheophyta', 'order': 'Sapindales', 'family': 'Sapindaceae',
+    'genus': 'Acer', 'species': 'Acer saccharum', 'kingdomKey': 6,
+    'phylumKey': 7707728, 'classKey': 220, 'orderKey': 933, 'familyKey': 6657,
+    'genusKey': 3189834, 'speciesKey': 3189863, 'synonym': False,
+    'class': 'Magnoliopsida'}
+ACER_RECORD = {
+    'key': 3189863, 'nubKey': 3189863, 'nameKey': 124, 'taxonID': 'gbif:3189863',
+    'kingdom': 'Plantae', 'phylum': 'Tracheophyta', 'order': 'Sapindales',
+    'family': 'Sapindaceae', 'genus': 'Acer', 'species': 'Acer saccharum',
+    'kingdomKey': 6, 'phylumKey': 7707728, 'classKey': 220, 'orderKey': 933,
+    'familyKey': 6657, 'genusKey': 3189834, 'speciesKey': 3189863,
+    'scientificName': 'Acer saccharum Marshall', 'canonicalName': 'Acer saccharum',
+    'authorship': 'Marshall', 'rank': 'SPECIES', 'taxonomicStatus': 'ACCEPTED',
+    'class': 'Magnoliopsida'}
+SYNONYM_MATCH = {
+    **ACER_MATCH, 'usageKey': 7263849, 'acceptedUsageKey': 3189863,
+    'scientificName': 'Acer barbatum Michx.', 'canonicalName': 'Acer barbatum',
+    'status': 'SYNONYM', 'synonym': True}
+SYNONYM_RECORD = {
+    **ACER_RECORD, 'key': 7263849, 'acceptedKey': 3189863, 'accepted': 'Acer saccharum Marshall',
+    'scientificName': 'Acer barbatum Michx.', 'canonicalName': 'Acer barbatum',
+    'authorship': 'Michx.', 'taxonomicStatus': 'SYNONYM'}
+GBIF_RESPONSES = {
+    ('match', 'Acer saccharum'): ACER_MATCH,
+    ('match', 'Acer barbatum'): SYNONYM_MATCH,
+    ('match', 'Acer freemanii'): {
+        **ACER_MATCH, 'scientificName': 'Acer ×freemanii E.Murray'},
+    ('get', 3189863): ACER_RECORD,
+    ('get', 7263849): SYNONYM_RECORD,
+}
+
+
+class TestGbifFromMatch(unittest.TestCase):
+    def setUp(self):
+        self.requests = []
+
+        def match(name):
+            self.requests.append('match')
+            return dict(GBIF_RESPONSES[('match', name)])
+
+        def get(key):
+            self.requests.append('get')
+            return dict(GBIF_RESPONSES[('get', key)])
+
+        for patcher in [patch.object(taxa_ref.gbif.Species, 'match', side_effect=match),
+                        patch.object(taxa_ref.gbif.Species, 'get', side_effect=get)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertSameRefs(self, name, requests):
+        expected = taxa_ref.TaxaRef.from_gbif(name, from_match=False)
+        self.requests.clear()
+        refs = taxa_ref.TaxaRef.from_gbif(name, from_match=True)
+        self.assertEqual(
+            [ref.__dict__ for ref in refs], [ref.__dict__ for ref in expected])
+        self.assertEqual(sorted(self.requests), requests)
+
+    def test_accepted(self):
+        self.assertSameRefs('Acer saccharum', ['match'])
+
+    def test_synonym(self):
+        self.assertSameRefs('Acer barbatum', ['get', 'get', 'match'])
+
+    def test_authorship_not_split(self):
+        self.assertSameRefs('Acer freemanii', ['get', 'match'])
+
+    def test_default(self):
+        with patch.object(taxa_ref, 'GBIF_FROM_MATCH', True):
+            taxa_ref.TaxaRef.from_gbif('Acer saccharum')
+        self.assertEqual(self.requests, ['match'])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch
+from urllib.error import URLError
+
+import context
+from stub_server import StubServer
+from bdqc_taxa import _transport, gbif, global_names, wikidata
+from bdqc_taxa.policy import RemoteSourceError
+
+
+def route(method, path, body):
+    if path.startswith('/v1/species/match'):
+        return 200, {'usageKey': 1, 'matchType': 'EXACT'}
+    if path.startswith('/v1/species/404'):
+        return 404, {'error': 'not found'}
+    if path.startswith('/v1/species/'):
+        return 200, {'key': int(path.split('/')[-1].split('?')[0])}
+    if path.startswith('/api/v1/verifications'):
+        return 200, {'names': [{'name': 'Acer', 'results': []}]}
+    if path.startswith('/w/api.php'):
+        return 200, {'search': [{'id': 'Q1'}], 'entities': {'Q1': {'id': 'Q1'}}}
+    return 404, {}
+
+
+class TestTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = StubServer(route).__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.addCleanup(_transport.close)
+
+    def test_keep_alive(self):
+        for key in range(5):
+            out = _transport.get_json(f"{self.server.url}/v1/species/{key}")
+            self.assertEqual(out['key'], key)
+        self.assertEqual(len(self.server.peers), 1)
+
+    def test_http_error(self):
+        with self.assertRaises(RemoteSourceError) as cm:
+            _transport.request('GET', f"{self.server.url}/v1/species/404")
+        self.assertEqual(cm.exception.status, 404)
+        self.assertEqual(cm.exception.code, 404)
+        self.assertIsInstance(cm.exception, URLError)
+        self.assertFalse(cm.exception.retryable)
+
+    def test_params(self):
+        _transport.request('GET', f"{self.server.url}/v1/species/1?a=1", {'b': 2})
+        self.assertEqual(self.server.requests[-1][1], '/v1/species/1?a=1&b=2')
+
+    def test_sources_use_transport(self):
+        with patch.object(gbif, 'HOST', self.server.url), \
+                patch.object(global_names, 'HOST', self.server.url), \
+                patch.object(wikidata, 'BASE_URL', f"{self.server.url}/w/api.php?"):
+            self.assertEqual(gbif.Species.get(3)['key'], 3)
+            self.assertEqual(gbif.Species.match('Acer')['usageKey'], 1)
+            with self.assertRaises(RemoteSourceError):
+                gbif.Species.get(404)
+            self.assertEqual(global_names._verify('Acer')['names'][0]['name'], 'Acer')
+            self.assertEqual(global_names.verify_many(['Acer'])[0][0]['name'], 'Acer')
+            self.assertEqual(wikidata.search_entities('Acer'), [{'id': 'Q1'}])
+            self.assertEqual(wikidata.get_entities(['Q1']), [{'id': 'Q1'}])
+        self.assertEqual(len(self.server.peers), 1)
+        self.assertEqual(self.server.requests[4][0], 'POST')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,8 @@
 from unittest import TestCase, result
+from unittest.mock import patch
+from concurrent.futures import Future
+import threading
+from bdqc_taxa import wikidata, _pool
 from bdqc_taxa.vernacular import Vernacular, initcap_vernacular
 
 class TestVernacular(TestCase):
@@ -153,4 +157,65 @@ class TestInitcap(TestCase):
         self.assertEqual(initcap_vernacular(text), text)
 
     def test_initcap_moineau(self, text = 'Moineau domestique'):
-        self.assertEqual(initcap_vernacular(text), text)
\ No newline at end of file
+        self.assertEqual(initcap_vernacular(text), text)
+
+
+def _entity(qid, rank, label):
+    return {
+        'id': qid,
+        'claims': {
+            'P105': [{'mainsnak': {'datavalue': {'value': {'id': wikidata.TAXA_RANKS_QID[rank]}}}}],
+            'P225': [{'mainsnak': {'datavalue': {'value': 'Canis lupus'}}}],
+        },
+        'labels': {'fr': {'value': label}},
+        'aliases': {},
+    }
+
+
+def _meeting(value, barrier):
+    # Fails with BrokenBarrierError unless all the parties run at once
+    def lookup(*args, **kwargs):
+        barrier.wait()
+        return value
+    return lookup
+
+
+class TestFromMatchConcurrent(TestCase):
+    def setUp(self):
+        self.gbif_out = [Vernacular('wolf', 'GBIF', 1, 'eng', 'species', 6)]
+        self.entities = [_entity('Q1', 'genus', 'genre'),
+                         _entity('Q2', 'species', 'loup gris')]
+
+    def test_gbif_rank(self, name='Canis lupus'):
+        barrier = threading.Barrier(2, timeout=5)
+        with patch.object(Vernacular, 'from_gbif_match',
+                          side_effect=_meeting(self.gbif_out, barrier)), \
+             patch.object(Vernacular, '_wikidata_entities',
+                          side_effect=_meeting(self.entities, barrier)):
+            out = Vernacular.from_match_concurrent(name)
+        self.assertEqual(out[0].source, 'GBIF')
+        self.assertEqual(out[-1].source, 'Wikidata')
+        # Filtered with the GBIF rank
+        self.assertEqual(out[-1].source_taxon_key, 'Q2')
+        self.assertEqual(out[-1].rank, 'species')
+
+    def test_wikidata_deadline(self, name='Canis lupus'):
+        # The Wikidata lookup never completes
+        wikidata_future = Future()
+        gbif_future = Future()
+        gbif_future.set_result(self.gbif_out)
+
+        def submit(func, *args, **kwargs):
+            return wikidata_future if func == Vernacular._wikidata_entities else gbif_future
+
+        with patch.object(_pool, 'submit', side_effect=submit), \
+             self.assertLogs('bdqc_taxa._pool', level='WARNING') as logs:
+            out = Vernacular.from_match_concurrent(name, timeouts={'wikidata': 0})
+        self.assertEqual(out[0].source, 'GBIF')
+        self.assertNotIn('Wikidata', [v.source for v in out])
+        self.assertTrue(wikidata_future.cancelled())
+        self.assertIn("Wikidata 'Canis lupus' timed out", logs.output[0])
+
+    def test_invalid_rank(self, name='Canis lupus'):
+        with self.assertRaises(ValueError):
+            Vernacular.from_match_concurrent(name, rank='not a rank')